@@ -0,0 +1,177 @@
+# Standard Libraries
+import json
+import time
+import random
+import asyncio
+import threading
+from pathlib import Path
+
+# Non-Standard Libraries
+from google.genai import types, errors
+from google.adk.models import BaseLlm, LlmResponse
+
+RECORDINGS_DIR = Path(__file__).parent / 'recordings'
+
+def load_recording(name):
+    '''Loads a recording file from benchmarks/recordings.'''
+    with open(RECORDINGS_DIR / name, encoding = 'utf-8') as f:
+        return json.load(f)
+
+def estimate_tokens(text):
+    '''Rough Gemini token count of a text (about four characters per token).'''
+    return len(text or '') // 4
+
+def make_response(text, usage = None):
+    '''Builds a GenerateContentResponse carrying the text and usage metadata of a recorded answer.'''
+    return types.GenerateContentResponse(
+        candidates = [types.Candidate(content = types.Content(role = 'model', parts = [types.Part(text = text)]))],
+        usage_metadata = types.GenerateContentResponseUsageMetadata(**(usage or {}))
+    )
+
+class _Latency:
+    '''
+    Sleeps for latency seconds plus uniform jitter of +/- jitter seconds;
+    a tail_rate fraction of the calls takes tail_latency seconds instead (the slow grounded calls of the real API).
+    '''
+
+    def __init__(self, latency, jitter, seed, tail_latency = 0.0, tail_rate = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                return self.tail_latency
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+class FakeCaches:
+    '''
+    Stand-in for client.caches: keeps cached contents in memory, and like the real API refuses to create one
+    below min_tokens and answers 404 for names it does not know (expired or deleted).
+    '''
+
+    def __init__(self, min_tokens):
+        self.min_tokens = min_tokens
+        self._contents = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def create(self, *, model, config):
+        tokens = estimate_tokens(config.system_instruction)
+        if tokens < self.min_tokens:
+            raise errors.ClientError(400, {'error': {'code': 400, 'status': 'INVALID_ARGUMENT',
+                'message': f'Cached content is too small. total_token_count={tokens}, min_total_token_count={self.min_tokens}'}})
+        with self._lock:
+            self._next += 1
+            self.created += 1
+            cached = types.CachedContent(
+                name = f'cachedContents/fake-{self._next}', display_name = config.display_name, model = f'models/{model}',
+                usage_metadata = types.CachedContentUsageMetadata(total_token_count = tokens)
+            )
+            self._contents[cached.name] = cached
+        return cached
+
+    def get(self, *, name, config = None):
+        with self._lock:
+            if name not in self._contents:
+                raise errors.ClientError(404, {'error': {'code': 404, 'status': 'NOT_FOUND', 'message': f'CachedContent not found: {name}'}})
+            return self._contents[name]
+
+    def update(self, *, name, config = None):
+        return self.get(name = name)
+
+    def delete(self, *, name, config = None):
+        self.get(name = name)
+        with self._lock:
+            del self._contents[name]
+
+    def list(self, *, config = None):
+        with self._lock:
+            return list(self._contents.values())
+
+class FakeModels:
+    '''Stand-in for client.models that replays recorded answers round robin.'''
+
+    def __init__(self, responses, latency, chunk_size, chunk_delay, caches, prefill_per_token):
+        self._responses = responses
+        self._latency = latency
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+        self._caches = caches
+        self._prefill_per_token = prefill_per_token
+        self._next = 0
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def _take(self, kwargs):
+        with self._lock:
+            recorded = self._responses[self._next % len(self._responses)]
+            self._next += 1
+            self.calls.append(kwargs)
+        return recorded
+
+    def _usage(self, recorded, contents, config):
+        # Prompt tokens of this request rather than the recorded ones, so moving the instruction into a cache shows up.
+        # Only uncached prompt tokens add prefill latency.
+        uncached = estimate_tokens(contents if isinstance(contents, str) else str(contents))
+        cached = 0
+        if config is not None and config.cached_content:
+            cached = self._caches.get(name = config.cached_content).usage_metadata.total_token_count
+        elif config is not None:
+            uncached += estimate_tokens(config.system_instruction)
+        usage = dict(recorded.get('usage') or {})
+        output = usage.get('candidates_token_count', 0)
+        usage.update(prompt_token_count = uncached + cached, cached_content_token_count = cached or None, total_token_count = uncached + cached + output)
+        return usage, uncached * self._prefill_per_token
+
+    def count_tokens(self, *, model, contents, config = None):
+        return types.CountTokensResponse(total_tokens = estimate_tokens(contents if isinstance(contents, str) else str(contents)))
+
+    def generate_content(self, *, model, contents, config = None):
+        recorded = self._take({'model': model, 'contents': contents, 'config': config})
+        usage, prefill = self._usage(recorded, contents, config)
+        time.sleep(self._latency.sample() + prefill)
+        return make_response(recorded['text'], usage)
+
+    def generate_content_stream(self, *, model, contents, config = None):
+        recorded = self._take({'model': model, 'contents': contents, 'config': config})
+        usage, prefill = self._usage(recorded, contents, config)
+        text = recorded['text']
+        # The latency is spent before the first chunk, later chunks trickle in every chunk_delay seconds.
+        time.sleep(self._latency.sample() + prefill)
+        for start in range(0, len(text), self._chunk_size):
+            last = start + self._chunk_size >= len(text)
+            yield make_response(text[start:start + self._chunk_size], usage if last else None)
+            if not last:
+                time.sleep(self._chunk_delay)
+
+class FakeGeminiClient:
+    '''
+    Local stand-in for google.genai.Client: replays recorded responses with configurable latency and jitter,
+    so searches can be benchmarked without network access or API spend. client.caches behaves like the context
+    caching API (min_cache_tokens mirrors the model's minimum cacheable size, 1024 tokens for 2.5 Flash),
+    prefill_per_token adds latency per uncached prompt token, and tail_rate / tail_latency simulate slow outliers.
+    Install it with concierge.agent.set_client(FakeGeminiClient(...)).
+    '''
+
+    def __init__(self, recording = 'gemini_search.json', latency = 0.0, jitter = 0.0, chunk_size = 64, chunk_delay = 0.0, seed = 0,
+                 min_cache_tokens = 1024, prefill_per_token = 0.0, tail_latency = 0.0, tail_rate = 0.0):
+        responses = load_recording(recording)['responses'] if isinstance(recording, str) else recording
+        self.caches = FakeCaches(min_cache_tokens)
+        latency = _Latency(latency, jitter, seed, tail_latency, tail_rate)
+        self.models = FakeModels(responses, latency, chunk_size, chunk_delay, self.caches, prefill_per_token)
+
+class FakeLlm(BaseLlm):
+    '''ADK model stand-in that answers every request with the same recorded text after an async delay.'''
+
+    text: str = ''
+    latency: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream = False):
+        await asyncio.sleep(self.latency)
+        yield LlmResponse(content = types.Content(role = 'model', parts = [types.Part(text = self.text)]))
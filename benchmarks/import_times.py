@@ -0,0 +1,73 @@
+'''
+Cold start import profile of the app.
+
+Imports the app module in a fresh interpreter with python -X importtime and reports the total import time,
+the slowest top-level packages and whether the lazily loaded heavy dependencies stayed unloaded:
+
+    python -m benchmarks.import_times --output import_report.json
+'''
+# Standard Libraries
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+# Loaded on first use only, none of them should show up before the first search.
+LAZY_MODULES = ['google.genai', 'google.adk', 'pandas', 'folium']
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def profile(module):
+    '''Runs "import module" under -X importtime and returns [(name, self_us, cumulative_us, depth)].'''
+    env = dict(os.environ)
+    env.setdefault('GOOGLE_API_KEY', 'import-profile-placeholder-key')
+    env.setdefault('PREFETCH_ENABLED', '0')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output = True, text = True, env = env, check = True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def summarize(entries, module, top):
+    target = next((cumulative for name, _, cumulative, _ in entries if name == module), None)
+    packages = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        packages['.'.join(name.split('.')[:2]) if name.startswith('google.') else name.split('.')[0]] += self_us
+    loaded = {name for name, _, _, _ in entries}
+    return {
+        'module': module,
+        'total_ms': (target or 0) / 1000,
+        'all_imports_ms': sum(self_us for _, self_us, _, _ in entries) / 1000,
+        'modules_imported': len(entries),
+        'slowest_packages_ms': {name: us / 1000 for name, us in sorted(packages.items(), key = lambda item: -item[1])[:top]},
+        'lazy_modules_loaded': {name: any(entry == name or entry.startswith(name + '.') for entry in loaded) for name in LAZY_MODULES},
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Profile the cold start imports of the app.')
+    parser.add_argument('--module', default = 'ui.streamlit_ui', help = 'Module to import.')
+    parser.add_argument('--top', type = int, default = 15, help = 'Number of slowest packages to report.')
+    parser.add_argument('--output', default = '-', help = 'Path of the JSON report ("-" for stdout only).')
+    args = parser.parse_args(argv)
+
+    report = summarize(profile(args.module), args.module, args.top)
+    output = json.dumps(report, indent = 2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            f.write(output)
+        print(f"Import report written to {args.output}", file = sys.stderr)
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+'''
+Multi-session load test for the Streamlit app.
+
+Drives N concurrent simulated sessions through Streamlit's AppTest: each one logs in, picks interests,
+a location and a date range, and presses Search, against FakeGeminiClient instead of the real API.
+Reports throughput, rerun latency percentiles and memory per session:
+
+    python -m benchmarks.load_test --sessions 20 --searches 3 --latency 1.0 --output load_report.json
+'''
+# Standard Libraries
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import resource
+import threading
+import tracemalloc
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('GOOGLE_API_KEY', 'load-test-placeholder-key')
+os.environ.setdefault('METRICS_LOG_ENABLED', '0')
+os.environ.setdefault('ADK_SESSION_BACKEND', 'memory')
+os.environ.setdefault('PREFETCH_ENABLED', '0')
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+
+# Non-Standard Libraries
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+
+# Custom Modules
+import concierge.agent as agent
+import services.search_cache as search_cache
+import services.event_store as event_store
+from benchmarks.fake_client import FakeGeminiClient
+from benchmarks.run_benchmarks import summarize, git_commit
+from config.settings import SEARCH_POLL_INTERVAL
+
+CITIES = ['Firenze, Italia', 'Roma, Italia', 'Milano, Italia', 'Bologna, Italia', 'Napoli, Italia', 'Torino, Italia']
+INTEREST_SETS = [['Jazz', 'Art'], ['Art', "Farmer's Market", 'Theatre'], ['Hiking'], ['Jazz', 'Theatre', 'Hiking', 'Art']]
+DATE_RANGE = (datetime.date(2025, 10, 20), datetime.date(2025, 10, 31)) # Matches the recorded events
+
+def share_runtime():
+    '''
+    Makes every AppTest run see one shared mock Runtime.
+    AppTest installs a fresh mock in the process-wide Runtime singleton for each run and clears it afterwards,
+    so concurrent sessions would pull it out from under each other. A real server also shares one runtime,
+    and with it the st.cache_data / st.cache_resource storage.
+    '''
+    runtime = MagicMock(spec = Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+def logged_in_app():
+    # Runs as the app script of every simulated session: AppTest has no OAuth flow, so mark the session as logged in.
+    from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+    get_script_run_ctx().user_info.update({'is_logged_in': True, 'name': 'Load Test', 'email': 'load-test@example.com'})
+
+    from ui.streamlit_ui import run_streamlit_app
+    run_streamlit_app()
+
+def timed_run(app, reruns, timeout):
+    start = time.perf_counter()
+    app.run(timeout = timeout)
+    reruns.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return app
+
+def run_session(index, searches, timeout, apps):
+    '''One simulated user: log in, fill in the search form, and press Search searches times.'''
+    reruns, submit_reruns, poll_reruns, searches_s = [], [], [], []
+    app = AppTest.from_function(logged_in_app, default_timeout = timeout)
+    apps.append(app) # Kept alive until the memory measurement
+    timed_run(app, reruns, timeout)
+
+    for search in range(searches):
+        app.multiselect[0].set_value(INTEREST_SETS[(index + search) % len(INTEREST_SETS)])
+        timed_run(app, reruns, timeout)
+        app.text_input[0].input(CITIES[(index + search) % len(CITIES)])
+        timed_run(app, reruns, timeout)
+        if not app.toggle[0].value:
+            app.toggle[0].set_value(True)
+            timed_run(app, reruns, timeout)
+        app.date_input[0].set_value(DATE_RANGE)
+        timed_run(app, reruns, timeout)
+
+        next(button for button in app.button if button.label == 'Search').click()
+        started = time.perf_counter()
+        timed_run(app, submit_reruns, timeout)
+        # The search runs as a background job; poll like the results fragment does until it has finished.
+        while app.session_state['search_job'] is not None:
+            time.sleep(SEARCH_POLL_INTERVAL)
+            timed_run(app, poll_reruns, timeout)
+        searches_s.append(time.perf_counter() - started)
+
+    return reruns, submit_reruns, poll_reruns, searches_s
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Simulate concurrent Streamlit sessions against a fake LLM backend.')
+    parser.add_argument('--sessions', type = int, default = 10, help = 'Concurrent simulated sessions.')
+    parser.add_argument('--searches', type = int, default = 2, help = 'Searches per session.')
+    parser.add_argument('--latency', type = float, default = 0.5, help = 'Simulated model latency in seconds.')
+    parser.add_argument('--jitter', type = float, default = 0.1, help = 'Uniform +/- jitter on the simulated latency, in seconds.')
+    parser.add_argument('--timeout', type = float, default = 120, help = 'Timeout of a single script run, in seconds.')
+    parser.add_argument('--output', default = 'load_report.json', help = 'Path of the JSON report ("-" for stdout only).')
+    args = parser.parse_args(argv)
+
+    share_runtime()
+    client = FakeGeminiClient(latency = args.latency, jitter = args.jitter)
+    agent.set_client(client)
+    search_cache._cache = search_cache.SearchCache(path = ':memory:')
+    event_store._store = event_store.EventStore(path = ':memory:')
+
+    apps = []
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = args.sessions, thread_name_prefix = 'load-session') as pool:
+        futures = [pool.submit(run_session, index, args.searches, args.timeout, apps) for index in range(args.sessions)]
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    reruns, submit_reruns, poll_reruns, searches_s = ([sample for result in results for sample in result[column]] for column in range(4))
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'sessions': args.sessions,
+            'searches_per_session': args.searches,
+            'model_latency_s': args.latency,
+            'jitter_s': args.jitter,
+            'threads_alive': threading.active_count(),
+        },
+        'throughput': {
+            'elapsed_s': elapsed,
+            'searches_completed': len(searches_s),
+            'searches_per_s': len(searches_s) / elapsed if elapsed else 0.0,
+            'reruns_per_s': (len(reruns) + len(submit_reruns) + len(poll_reruns)) / elapsed if elapsed else 0.0,
+            'model_calls': len(client.models.calls),
+        },
+        'latency': {
+            'input_rerun': summarize(reruns) if reruns else None,
+            'search_submit_rerun': summarize(submit_reruns) if submit_reruns else None,
+            'poll_rerun': summarize(poll_reruns) if poll_reruns else None,
+            'search_total': summarize(searches_s) if searches_s else None,
+        },
+        'memory': {
+            'python_heap_per_session_bytes': (current - baseline) / max(1, len(apps)),
+            'python_heap_peak_bytes': peak,
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, # ru_maxrss is in KiB on Linux
+        },
+        'errors': errors,
+    }
+
+    output = json.dumps(report, indent = 2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            f.write(output)
+        print(f"Load test report written to {args.output}", file = sys.stderr)
+    print(
+        f"{report['throughput']['searches_completed']} searches in {elapsed:.1f}s "
+        f"({report['throughput']['searches_per_s']:.2f}/s), {len(errors)} failed sessions",
+        file = sys.stderr
+    )
+    return report
+
+if __name__ == '__main__':
+    main()
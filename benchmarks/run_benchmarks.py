@@ -0,0 +1,242 @@
+'''
+Offline performance benchmarks for Locale.
+
+Replays recorded Gemini answers through FakeGeminiClient / FakeLlm (no network, no API key needed)
+and writes a machine-readable JSON report so runs can be compared in CI:
+
+    python -m benchmarks.run_benchmarks --latency 0.5 --jitter 0.1 --output bench_report.json
+'''
+# Standard Libraries
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import datetime
+import platform
+import subprocess
+
+# The app modules read these at import time: no real key is needed, and per-span logs would drown the report.
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-placeholder-key')
+os.environ.setdefault('METRICS_LOG_ENABLED', '0')
+os.environ.setdefault('ADK_SESSION_BACKEND', 'memory')
+os.environ.setdefault('PREFETCH_ENABLED', '0')
+# Streamlit warns about the missing script run context on every element rendered in bare mode.
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+
+# Custom Modules
+import concierge.agent as agent
+import services.search_cache as search_cache
+import services.event_store as event_store
+from benchmarks.fake_client import FakeGeminiClient, FakeLlm, load_recording
+from concierge.parsing import parse_events
+
+LOCATION = 'Firenze, Italia'
+INTERESTS = ['Jazz', 'Art', "Farmer's Market"]
+DATE_RANGE = (datetime.date(2025, 10, 20), datetime.date(2025, 10, 31)) # Matches the recorded events
+
+def summarize(samples):
+    '''Summary statistics of a list of durations, in milliseconds.'''
+    ordered = sorted(samples)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {
+        'n': len(ordered),
+        'mean_ms': 1000 * sum(ordered) / len(ordered),
+        'p50_ms': 1000 * pick(0.50),
+        'p95_ms': 1000 * pick(0.95),
+        'min_ms': 1000 * ordered[0],
+        'max_ms': 1000 * ordered[-1],
+    }
+
+def fresh_cache():
+    # Every repeat starts cold, otherwise only the first search would reach the fake client.
+    search_cache._cache = search_cache.SearchCache(path = ':memory:')
+    event_store._store = event_store.EventStore(path = ':memory:')
+
+def bench_search(repeats, latency, jitter):
+    '''End-to-end search_events latency on a cold cache, and the warm (cached) repeat.'''
+    from services.search_service import search_events
+
+    agent.set_client(FakeGeminiClient(latency = latency, jitter = jitter))
+    cold, warm = [], []
+    for _ in range(repeats):
+        fresh_cache()
+        start = time.perf_counter()
+        events = search_events(INTERESTS, LOCATION, DATE_RANGE)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        search_events(INTERESTS, LOCATION, DATE_RANGE)
+        warm.append(time.perf_counter() - start)
+    return {'cold': summarize(cold), 'warm': summarize(warm), 'events': len(events), 'model_latency_s': latency, 'jitter_s': jitter}
+
+def bench_stream(repeats, latency, jitter, chunk_delay):
+    '''Time to first event and total time of stream_events on a cold cache.'''
+    from services.search_service import stream_events
+
+    agent.set_client(FakeGeminiClient(latency = latency, jitter = jitter, chunk_delay = chunk_delay))
+    first, total = [], []
+    for _ in range(repeats):
+        fresh_cache()
+        start = time.perf_counter()
+        first_at = None
+        for _event in stream_events(INTERESTS, LOCATION, DATE_RANGE):
+            if first_at is None:
+                first_at = time.perf_counter() - start
+        total.append(time.perf_counter() - start)
+        first.append(first_at if first_at is not None else total[-1])
+    return {'time_to_first_event': summarize(first), 'total': summarize(total), 'chunk_delay_s': chunk_delay}
+
+def bench_tail(searches, latency, tail_latency, tail_rate, deadline):
+    '''
+    Search latency percentiles when a tail_rate fraction of the model calls takes tail_latency seconds,
+    with and without hedged requests, under a per-search deadline. The rate limiter is lifted for the run.
+    '''
+    import utils.hedge as hedge
+    from utils.rate_limit import model_scheduler
+    from services.search_service import search_events
+
+    saved = (hedge.HEDGE_ENABLED, hedge.HEDGE_MIN_DELAY, model_scheduler.rate, model_scheduler.max_rate)
+    model_scheduler.rate = model_scheduler.max_rate = 1000.0
+    hedge.HEDGE_MIN_DELAY = 0.0 # The production floor is meant for real (multi second) calls
+    results = {}
+    try:
+        for name, enabled in (('unhedged', False), ('hedged', True)):
+            hedge.HEDGE_ENABLED = enabled
+            agent.set_client(FakeGeminiClient(latency = latency, tail_latency = tail_latency, tail_rate = tail_rate))
+            samples, incomplete = [], 0
+            for index in range(searches):
+                fresh_cache()
+                missing = []
+                start = time.perf_counter()
+                # A new location per search, so no search coalesces onto a slow call left over from the previous one.
+                search_events(INTERESTS, f'{LOCATION} {name} {index}', DATE_RANGE, incomplete = missing.extend, deadline = deadline)
+                samples.append(time.perf_counter() - start)
+                incomplete += bool(missing)
+            results[name] = {'latency': summarize(samples), 'incomplete_searches': incomplete}
+    finally:
+        hedge.HEDGE_ENABLED, hedge.HEDGE_MIN_DELAY, model_scheduler.rate, model_scheduler.max_rate = saved
+    return dict(results, model_latency_s = latency, tail_latency_s = tail_latency, tail_rate = tail_rate, deadline_s = deadline)
+
+def bench_parse(repeats):
+    '''parse_events time per recorded answer.'''
+    texts = [response['text'] for response in load_recording('gemini_search.json')['responses']]
+    samples = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            parse_events(text)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def synthetic_events(count, seed = 0):
+    '''count events cloned from the recording, with distinct names and coordinates scattered around Firenze.'''
+    rng = random.Random(seed)
+    recorded = [event for response in load_recording('gemini_search.json')['responses'] for event in parse_events(response['text'])]
+    events = []
+    for index in range(count):
+        event = dict(recorded[index % len(recorded)])
+        event['event_name'] = f"{event['event_name']} #{index}"
+        event['event_location'] = f"{43.77 + rng.uniform(-0.05, 0.05):.4f}, {11.25 + rng.uniform(-0.05, 0.05):.4f}"
+        events.append(event)
+    return events
+
+def bench_render(repeats, sizes):
+    '''Cold load_events time for result sets of the given sizes (Streamlit bare mode, no browser).'''
+    from ui.components import load_events, build_event_table
+    from utils.helpers import response_key
+
+    results = {}
+    for size in sizes:
+        events = synthetic_events(size)
+        samples = []
+        for _ in range(repeats):
+            # Measure a new response being rendered, not the cached map data of the previous repeat.
+            build_event_table.clear()
+            start = time.perf_counter()
+            load_events(events, response_key(events))
+            samples.append(time.perf_counter() - start)
+        results[str(size)] = summarize(samples)
+    return results
+
+def bench_adk(repeats, latency):
+    '''Overhead of run_adk_async around the ADK pipeline, with FakeLlm search agents answering after latency seconds.'''
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from concierge.agent_adk import build_root_agent, rate_limit_plugin
+    from config.settings import APP_NAME_FOR_ADK, USER_ID
+    from services.concierge_service import run_adk_async
+
+    text = load_recording('adk_search.json')['text']
+    session_service = InMemorySessionService()
+    loop = asyncio.new_event_loop()
+    samples = []
+    try:
+        for index in range(repeats):
+            root = build_root_agent(INTERESTS)
+            for search_agent in root.sub_agents[0].sub_agents:
+                search_agent.model = FakeLlm(model = 'fake-gemini', text = text, latency = latency)
+                search_agent.tools = []
+            runner = Runner(agent = root, app_name = APP_NAME_FOR_ADK, session_service = session_service, plugins = [rate_limit_plugin])
+            session_id = f'benchmark_{index}'
+            loop.run_until_complete(session_service.create_session(app_name = APP_NAME_FOR_ADK, user_id = USER_ID, session_id = session_id))
+
+            start = time.perf_counter()
+            loop.run_until_complete(run_adk_async(runner, session_id, f'Interests: {INTERESTS} Location: {LOCATION}'))
+            # The parallel searches each wait latency seconds, the rest is pipeline overhead.
+            samples.append(time.perf_counter() - start - latency)
+    finally:
+        loop.close()
+    return {'overhead': summarize(samples), 'model_latency_s': latency}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Run the offline Locale benchmarks and write a JSON report.')
+    parser.add_argument('--repeats', type = int, default = 5, help = 'Repeats per benchmark.')
+    parser.add_argument('--latency', type = float, default = 0.2, help = 'Simulated model latency in seconds.')
+    parser.add_argument('--jitter', type = float, default = 0.05, help = 'Uniform +/- jitter on the simulated latency, in seconds.')
+    parser.add_argument('--chunk-delay', type = float, default = 0.01, help = 'Delay between streamed chunks, in seconds.')
+    parser.add_argument('--render-sizes', type = int, nargs = '+', default = [10, 100, 1000], help = 'Event counts for the render benchmark.')
+    parser.add_argument('--output', default = 'bench_report.json', help = 'Path of the JSON report ("-" for stdout only).')
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeats': args.repeats,
+        },
+        'results': {},
+    }
+    benchmarks = {
+        'search': lambda: bench_search(args.repeats, args.latency, args.jitter),
+        'stream': lambda: bench_stream(args.repeats, args.latency, args.jitter, args.chunk_delay),
+        'tail': lambda: bench_tail(max(40, args.repeats * 10), args.latency, args.latency * 10, 0.02, args.latency * 5),
+        'parse': lambda: bench_parse(args.repeats * 20),
+        'render': lambda: bench_render(args.repeats, args.render_sizes),
+        'adk': lambda: bench_adk(args.repeats, args.latency),
+    }
+    for name, run in benchmarks.items():
+        print(f"Running {name} benchmark...", file = sys.stderr)
+        report['results'][name] = run()
+
+    output = json.dumps(report, indent = 2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            f.write(output)
+        print(f"Benchmark report written to {args.output}", file = sys.stderr)
+    return report
+
+if __name__ == '__main__':
+    main()
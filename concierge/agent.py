@@ -1,8 +1,18 @@
-from google import genai
-from pydantic import BaseModel
-from google.genai import types
+import time
+import queue
+import logging
+import threading
+import contextvars
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from config.settings import MODEL_GEMINI
+from config.settings import MODEL_GEMINI, MAX_PARALLEL_SEARCHES, SEARCH_JSON_MODE
+from concierge.parsing import EventInfo, parse_events, iter_events
+from utils.query import format_date_range
+from utils.metrics import metrics
+from utils.rate_limit import model_scheduler
+from utils.hedge import hedge_delay, hedged_call, hedged_stream
+from concierge.prompt_cache import prompt_cache
 
 # The instruction from your original agent, which will be the tool's system prompt
 CONCIERGE_INSTRUCTION = """
@@ -56,34 +66,231 @@ Each JSON object represents a confirmed event.
 - Return only the JSON array, properly formatted and valid.
 """
 
-class EventInfo(BaseModel):
-    
-    event_category: str
-    event_name: str
-    event_source_link: str
-    event_date: str
-    event_location: str
-    event_description: str
+# google.genai takes most of a second to import, so the client and config are only built on the first search.
+_client = None
+_config = None
+_client_lock = threading.Lock()
 
-client = genai.Client()
+def get_client():
+    '''Returns the Gemini client shared by every session, creating it on first use.'''
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
 
-grounding_tool = types.Tool(
-    google_search=types.GoogleSearch()
-)
+            with metrics.span('startup.genai_client'):
+                _client = genai.Client()
+        return _client
 
-config = types.GenerateContentConfig(
-    tools=[grounding_tool],
-    response_schema = list[EventInfo],
-)
+def set_client(new_client):
+    '''Replaces the Gemini client used by every call in this module (e.g. with the benchmarks' replaying fake).'''
+    global _client
+    with _client_lock:
+        _client = new_client
+
+def get_config():
+    '''Returns the uncached search GenerateContentConfig (instruction, Google Search grounding, event schema), building it on first use.'''
+    global _config
+    with _client_lock:
+        if _config is None:
+            from google.genai import types
+
+            grounding_tool = types.Tool(
+                google_search=types.GoogleSearch()
+            )
+
+            _config = types.GenerateContentConfig(
+                system_instruction = CONCIERGE_INSTRUCTION,
+                tools=[grounding_tool],
+                response_schema = list[EventInfo],
+                # JSON mode next to the Google Search tool is only accepted by newer models (not 2.5), see SEARCH_JSON_MODE.
+                response_mime_type = 'application/json' if SEARCH_JSON_MODE else None,
+            )
+        return _config
+
+def request_config():
+    '''
+    Config of one search request. The static instruction and tools are served from the context cache when there is one
+    (the API rejects them next to cached_content), otherwise they are sent with the request.
+    '''
+    config = get_config()
+    name = prompt_cache.get(get_client(), MODEL_GEMINI, CONCIERGE_INSTRUCTION, config.tools)
+    if name is None:
+        return config
+    return config.model_copy(update = {'cached_content': name, 'system_instruction': None, 'tools': None})
+
+def is_missing_cache(error, config):
+    '''True when a request made with a context cache failed because the cache is gone (expired or deleted elsewhere).'''
+    return config.cached_content is not None and getattr(error, 'code', None) in (400, 403, 404) and 'cache' in str(error).lower()
+
+def build_prompt(interests, location, date_range):
+    '''Builds the user part of the search prompt for the given interests, location and date range.'''
+    with metrics.span('prompt.build'):
+        return f"""
+                    Conduct a google search of an area to help the user find an activity/event based on their provided interests below. Ensure the events are relevant and occur on the day at the place provided:
+                    User Interests: {interests}
+                    Date Range: {format_date_range(date_range)}
+                    Location: {location}
+                    """
+
+def record_response(response):
+    '''Adds a response's token usage and grounding (Google Search) tool calls to the metrics.'''
+    metrics.record_usage(getattr(response, 'usage_metadata', None))
+    for candidate in getattr(response, 'candidates', None) or []:
+        grounding = getattr(candidate, 'grounding_metadata', None)
+        if grounding and grounding.web_search_queries:
+            metrics.increment('grounding.search_queries', len(grounding.web_search_queries))
 
 def invoke(prompt):
-    response = client.models.generate_content(
-        model = MODEL_GEMINI,
-        contents = CONCIERGE_INSTRUCTION + prompt,
-        config = config
-        
-    )
+    def generate():
+        config = request_config()
+        with metrics.span('gemini.generate'):
+            try:
+                return get_client().models.generate_content(model = MODEL_GEMINI, contents = prompt, config = config)
+            except Exception as e:
+                if not is_missing_cache(e, config):
+                    raise
+                prompt_cache.invalidate()
+                return get_client().models.generate_content(model = MODEL_GEMINI, contents = prompt, config = request_config())
+
+    # Waits for the process wide rate limit, 429/503 answers are retried with backoff.
+    # A call slower than the recent p95 gets a duplicate, the first answer is used.
+    response = hedged_call(lambda: model_scheduler.call(generate), hedge_delay('gemini.generate'))
+    record_response(response)
 
     return response.text
 
+def generate_stream(prompt):
+    config = request_config()
+    start = time.perf_counter()
+    try:
+        stream = get_client().models.generate_content_stream(model = MODEL_GEMINI, contents = prompt, config = config)
+        first = next(stream, None)
+        # Per attempt (unlike gemini.first_chunk), this is what decides when a stream gets hedged.
+        metrics.observe('gemini.stream_first_chunk', time.perf_counter() - start)
+    except Exception as e:
+        if not is_missing_cache(e, config):
+            raise
+        prompt_cache.invalidate()
+        yield from get_client().models.generate_content_stream(model = MODEL_GEMINI, contents = prompt, config = request_config())
+        return
+    if first is not None:
+        yield first
+        yield from stream
+
+def invoke_stream(prompt):
+    '''Streaming variant of invoke, yields the answer text chunk by chunk as the model generates it.'''
+    start = time.perf_counter()
+    chunk = None
+    with metrics.span('gemini.stream'):
+        # Holds a rate limiter slot for the whole stream (the wait for it is in model.queue_wait.*).
+        # A stream without a first chunk by the recent p95 gets a duplicate, the first one to answer is used.
+        for chunk in hedged_stream(lambda: model_scheduler.stream(generate_stream, prompt), hedge_delay('gemini.stream_first_chunk')):
+            if chunk.text:
+                if start is not None:
+                    metrics.observe('gemini.first_chunk', time.perf_counter() - start)
+                    start = None
+                yield chunk.text
+    if chunk is not None:
+        # Usage and grounding metadata are complete on the last chunk.
+        record_response(chunk)
+
+def search_interest(interest, location, date_range):
+    '''Runs one grounded search for a single interest and returns its parsed events.'''
+    text = invoke(build_prompt([interest], location, date_range))
+    with metrics.span('parse.events'):
+        events = parse_events(text)
+    # Fall back to the searched interest when the model leaves the category empty.
+    for event in events:
+        event['event_category'] = event.get('event_category') or interest
+    return events
+
+def search_parallel(tasks, search = search_interest, timeout = None):
+    '''
+    Runs search(*task) for every task (e.g. an (interest, location, date_range) tuple) on a bounded thread pool.
+    Returns the results in task order, with None for the tasks that failed or had not finished after timeout seconds.
+    '''
+    if not tasks:
+        return []
+
+    def run(task):
+        try:
+            return search(*task)
+        except Exception as e:
+            # One failing search should not throw away the results of the others.
+            metrics.increment('search.task_errors')
+            metrics.log('search.task_failed', logging.ERROR, task = task, error = repr(e))
+            return None
+
+    pool = ThreadPoolExecutor(max_workers = min(MAX_PARALLEL_SEARCHES, len(tasks)), thread_name_prefix = 'concierge-search')
+    try:
+        # Each task runs in a copy of the caller's context, so its model calls keep the caller's priority.
+        futures = [pool.submit(contextvars.copy_context().run, run, task) for task in tasks]
+        wait(futures, timeout = timeout)
+    finally:
+        # Tasks still running at the deadline finish in the background (and still fill the cache), queued ones are dropped.
+        pool.shutdown(wait = False, cancel_futures = True)
+
+    late = [task for task, future in zip(tasks, futures) if not future.done() or future.cancelled()]
+    if late:
+        metrics.increment('search.deadline_exceeded', len(late))
+        metrics.log('search.deadline_exceeded', late = len(late), tasks = len(tasks), deadline_s = timeout)
+    return [future.result() if future.done() and not future.cancelled() else None for future in futures]
+
+def stream_interest(interest, location, date_range):
+    '''Streaming variant of search_interest, yields each event as soon as the model has written it.'''
+    for event in iter_events(invoke_stream(build_prompt([interest], location, date_range))):
+        event['event_category'] = event.get('event_category') or interest
+        yield event
+
+_FINISHED = object() # Sentinel put on the queue when a worker thread exits
+
+def stream_parallel(tasks, stream = stream_interest, timeout = None):
+    '''
+    Runs stream(*task) for every task concurrently and yields (task, event) pairs in arrival order.
+    Once a task has streamed all of its events successfully, (task, None) is yielded;
+    a task that fails, or is still streaming after timeout seconds, is logged and never marked as finished.
+    Closing the generator (e.g. a cancelled search) stops the workers and their model streams.
+    '''
+    if not tasks:
+        return
+
+    events = queue.Queue()
+    stopped = threading.Event()
+
+    def run(task):
+        try:
+            with closing(stream(*task)) as task_events:
+                for event in task_events:
+                    if stopped.is_set():
+                        return
+                    events.put((task, event))
+            events.put((task, None))
+        except Exception as e:
+            metrics.increment('search.task_errors')
+            metrics.log('search.stream_failed', logging.ERROR, task = task, error = repr(e))
+        finally:
+            events.put(_FINISHED)
+
+    pool = ThreadPoolExecutor(max_workers = min(MAX_PARALLEL_SEARCHES, len(tasks)), thread_name_prefix = 'concierge-stream')
+    for task in tasks:
+        # In a copy of the caller's context, so the model calls keep the caller's priority
+        pool.submit(contextvars.copy_context().run, run, task)
 
+    running = len(tasks)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while running:
+            try:
+                item = events.get(timeout = None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                metrics.increment('search.deadline_exceeded', running)
+                metrics.log('search.deadline_exceeded', late = running, tasks = len(tasks), deadline_s = timeout, streaming = True)
+                return
+            if item is _FINISHED:
+                running -= 1
+            else:
+                yield item
+    finally:
+        stopped.set()
+        pool.shutdown(wait = False, cancel_futures = True)
@@ -1,11 +1,27 @@
+import re
+import json
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import AsyncGenerator, Optional
 
-from google.adk.agents import SequentialAgent, LlmAgent
+from google.adk.agents import SequentialAgent, ParallelAgent, LlmAgent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
 from google.genai import types
 from google.adk.tools import google_search
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, RootModel, Field, ValidationError
 
 
 from config.settings import MODEL_GEMINI
+from concierge.parsing import parse_markdown_events
+from utils.metrics import metrics
+from utils.rate_limit import model_scheduler
 
 # The instruction from your original agent, which will be the tool's system prompt
 CONCIERGE_INSTRUCTION = """
@@ -50,6 +66,9 @@ class EventInfo(BaseModel):
     description: str # = Field(description = 'A concise 1-2 sentence summary of the activity / event.')
     location: str # = Field(description = 'Floating point longitude and latitude decimals rounded to the nearest 100th place marking the exact location of the event. Seperated by a comma.')
 
+class EventList(RootModel[list[EventInfo]]):
+    '''Output schema of the LLM formatter: a list of events, the same shape LocalFormatterAgent writes.'''
+
 
 search_agent = LlmAgent(
     model = MODEL_GEMINI,
@@ -61,27 +80,218 @@ search_agent = LlmAgent(
     output_key = 'search_agent_result'
 )
 
-response_formatter_agent = LlmAgent(
-    model = MODEL_GEMINI,
-    name = 'ResponseFormatter',
-    description = 'An agent that formats the previous Agent response.',
-    generate_content_config=types.GenerateContentConfig(temperature = 0.1),
-    instruction = """
-                Based on the provided input {search_agent_result} generate the following in a structured JSON format:
-                event_type: "The relevant interest category of the activity / event (e.g. 'Art', 'Music').")
-                event_name: The name of the activity / event (bolded).
-                date: The exact date(s) and time range (e.g., 'October 15th, 2025, 10:00 AM - 2:00 PM').
-                source_link: A single, direct, functioning hyperlink formatted using **Markdown syntax: `[Source Link Text](URL)`** (e.g., 'Official Website,' 'Tickets,' or the domain name).
-                description: A concise 1-2 sentence summary of the activity / event.
-                location: Floating point longitude and latitude decimals rounded to the nearest 100th place marking the exact location of the event, seperated by a comma.
-                """,
-    output_schema = EventInfo
+def build_response_formatter_agent():
+    '''Creates the LLM formatter agent. ADK agents can only have one parent, so every pipeline needs its own.'''
+    return LlmAgent(
+        model = MODEL_GEMINI,
+        name = 'ResponseFormatter',
+        description = 'An agent that formats the previous Agent response.',
+        generate_content_config=types.GenerateContentConfig(temperature = 0.1),
+        instruction = """
+                    Based on the provided input {search_agent_result} generate a JSON array with one object per event, each with the following fields:
+                    event_type: "The relevant interest category of the activity / event (e.g. 'Art', 'Music').")
+                    event_name: The name of the activity / event (bolded).
+                    date: The exact date(s) and time range (e.g., 'October 15th, 2025, 10:00 AM - 2:00 PM').
+                    source_link: A single, direct, functioning hyperlink formatted using **Markdown syntax: `[Source Link Text](URL)`** (e.g., 'Official Website,' 'Tickets,' or the domain name).
+                    description: A concise 1-2 sentence summary of the activity / event.
+                    location: Floating point longitude and latitude decimals rounded to the nearest 100th place marking the exact location of the event, seperated by a comma.
+                    """,
+        output_schema = EventList,
+        output_key = 'formatted_events'
+    )
+
+response_formatter_agent = build_response_formatter_agent()
+
+# How often LocalFormatterAgent could skip the formatter LLM call; updated by concurrent runs, hence the lock.
+FORMATTER_STATS = {'fast_path': 0, 'fallback': 0}
+_formatter_stats_lock = threading.Lock()
+
+def count_formatter(path):
+    with _formatter_stats_lock:
+        FORMATTER_STATS[path] += 1
+
+def formatter_stats():
+    '''Returns the fast path / fallback counters together with the fast path rate.'''
+    with _formatter_stats_lock:
+        stats = dict(FORMATTER_STATS)
+    total = stats['fast_path'] + stats['fallback']
+    return dict(stats, fast_path_rate = stats['fast_path'] / total if total else 0.0)
+
+class LocalFormatterAgent(BaseAgent):
+    '''
+    Non-LLM formatting stage: parses the search agent's fixed five-field bullet list locally
+    and only hands over to the LLM formatter when the text does not follow that format.
+    '''
+
+    formatter: LlmAgent
+    input_key: str = 'search_agent_result'
+    output_key: str = 'formatted_events'
+
+    def __init__(self, name: str, formatter: LlmAgent, **kwargs):
+        super().__init__(name = name, formatter = formatter, sub_agents = [formatter], **kwargs)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        events = parse_markdown_events(ctx.session.state.get(self.input_key, ''))
+        if events is not None:
+            try:
+                events = [EventInfo(**event).model_dump() for event in events]
+            except ValidationError:
+                events = None
+
+        if events is None:
+            count_formatter('fallback')
+            metrics.log('adk.formatter_fallback', formatter = self.formatter.name, **formatter_stats())
+            async for event in self.formatter.run_async(ctx):
+                yield event
+            return
+
+        count_formatter('fast_path')
+        yield Event(
+            author = self.name,
+            invocation_id = ctx.invocation_id,
+            branch = ctx.branch,
+            content = types.Content(role = 'model', parts = [types.Part(text = json.dumps(events))]),
+            actions = EventActions(state_delta = {self.output_key: events})
+        )
+
+local_formatter_agent = LocalFormatterAgent(
+    name = 'LocalFormatter',
+    formatter = response_formatter_agent,
+    description = 'Parses the search agent result locally, using the ResponseFormatter agent only as a fallback.'
 )
 
 root_agent = SequentialAgent(
     name = 'RootAgent',
     sub_agents= [search_agent,
-                 response_formatter_agent]
+                 local_formatter_agent]
 )
 
-    
+_search_started = {} # (invocation_id, agent_name) -> perf_counter() when the search agent started
+
+def _start_search_timer(callback_context: CallbackContext) -> Optional[types.Content]:
+    _search_started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+    return None
+
+def _stop_search_timer(callback_context: CallbackContext) -> Optional[types.Content]:
+    started = _search_started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if started is not None:
+        callback_context.state[f'timing_{callback_context.agent_name}'] = time.perf_counter() - started
+    return None
+
+def build_interest_search_agent(interest: str, index: int) -> LlmAgent:
+    '''Creates a search agent restricted to a single interest, writing to its own output key.'''
+    # Braces would be read as state placeholders by the ADK instruction template.
+    interest = re.sub(r'[{}]', '', interest).strip()
+    return LlmAgent(
+        model = MODEL_GEMINI,
+        name = f'SearchAgent_{index}',
+        description = f'An agent that searches the web for {interest} activities.',
+        generate_content_config=types.GenerateContentConfig(temperature = 0.1),
+        instruction = CONCIERGE_INSTRUCTION + f"""
+**THIS SEARCH:** Only search for the interest **{interest}**, ignore every other interest in the user's message.
+""",
+        tools = [google_search],
+        output_key = f'search_agent_result_{index}',
+        before_agent_callback = _start_search_timer,
+        after_agent_callback = _stop_search_timer
+    )
+
+class MergeSearchResultsAgent(BaseAgent):
+    '''
+    Non-LLM stage that joins the per-interest search results into search_agent_result, one heading per interest,
+    and collects the per-interest search timings into search_timings.
+    '''
+
+    interests: list[str]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        sections = []
+        timings = {}
+        for index, interest in enumerate(self.interests):
+            result = ctx.session.state.get(f'search_agent_result_{index}') or ''
+            sections.append(f'### {interest}\n{result}')
+            timings[interest] = ctx.session.state.get(f'timing_SearchAgent_{index}')
+
+        metrics.log('adk.search_timings', timings_s = timings)
+        yield Event(
+            author = self.name,
+            invocation_id = ctx.invocation_id,
+            branch = ctx.branch,
+            actions = EventActions(state_delta = {'search_agent_result': '\n\n'.join(sections), 'search_timings': timings})
+        )
+
+def build_root_agent(interests: list[str]) -> BaseAgent:
+    '''
+    Builds the pipeline for one request: a ParallelAgent with one search agent per interest,
+    a merge step, then the local formatter. A many-interest query takes about as long as its slowest interest.
+    '''
+    if not interests:
+        return root_agent
+
+    return SequentialAgent(
+        name = 'RootAgent',
+        sub_agents = [
+            ParallelAgent(
+                name = 'ParallelSearch',
+                sub_agents = [build_interest_search_agent(interest, index) for index, interest in enumerate(interests)]
+            ),
+            MergeSearchResultsAgent(name = 'MergeSearchResults', interests = list(interests)),
+            LocalFormatterAgent(name = 'LocalFormatter', formatter = build_response_formatter_agent())
+        ]
+    )
+
+# Slots taken by the model calls of the current runner turn, see RateLimitPlugin.turn().
+_held_slots = contextvars.ContextVar('held_slots', default = None)
+
+class RateLimitPlugin(BasePlugin):
+    '''
+    Runner plugin that sends every model call of the ADK pipeline through the process wide model scheduler,
+    so ADK turns share the rate limit, in-flight cap and 429 back-pressure of the direct Gemini calls.
+    Runner turns should run inside turn(): ADK skips the after/error callbacks when a turn is cancelled or fails
+    between them, and the slots those calls took are then given back when the turn ends.
+    '''
+
+    def __init__(self, scheduler = model_scheduler):
+        super().__init__(name = 'rate_limit')
+        self.scheduler = scheduler
+
+    @contextmanager
+    def turn(self):
+        '''Scope of one runner turn; releases the slots its model calls still hold when it ends, however it ends.'''
+        held = []
+        # The parallel interest agents run in tasks copied from this context, so they share the list.
+        token = _held_slots.set(held)
+        try:
+            yield
+        finally:
+            _held_slots.reset(token)
+            while held:
+                held.pop()
+                self.scheduler.release(asyncio.CancelledError())
+
+    def _release(self, error = None):
+        held = _held_slots.get()
+        if held is None:
+            self.scheduler.release(error)
+        elif held:
+            # At most one release per slot taken, even if ADK reports a call more than once.
+            held.pop()
+            self.scheduler.release(error)
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        await self.scheduler.acquire_async()
+        held = _held_slots.get()
+        if held is not None:
+            held.append(callback_context.invocation_id)
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        self._release()
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception) -> Optional[LlmResponse]:
+        # A 429/503 here lowers the shared rate; ADK surfaces the error itself.
+        self._release(error)
+        return None
+
+rate_limit_plugin = RateLimitPlugin()
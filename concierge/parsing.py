@@ -0,0 +1,250 @@
+# Standard Libraries
+import re
+import json
+
+# Non-Standard Libraries
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# Custom Modules
+from utils.metrics import metrics
+
+class EventInfo(BaseModel):
+    
+    event_category: str
+    event_name: str
+    event_source_link: str
+    event_date: str
+    event_location: str
+    event_description: str
+
+# Validates a whole answer in one pass (pydantic-core parses the JSON itself).
+EVENT_LIST = TypeAdapter(list[EventInfo])
+
+_CODE_FENCE = re.compile(r'^\s*```[A-Za-z]*\s*|\s*```\s*$')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+class UnparseableAnswer(ValueError):
+    '''Raised for an answer that holds no valid event and is not an empty array either (prose, a refusal, garbage).'''
+
+def strip_code_fences(text):
+    '''Removes the markdown code fences the model sometimes wraps its JSON answer in.'''
+    return _CODE_FENCE.sub('', text.strip())
+
+def parse_events(text):
+    '''
+    Parses the model's JSON array answer into a list of event dictionaries.
+    A well-formed answer is validated against EventInfo in one pass. A damaged one (stray prose, a truncated array,
+    one malformed or incomplete element) is salvaged event by event, so a single bad element does not cost the search.
+    Returns an empty list when the model answered with nothing or an empty array, and raises UnparseableAnswer
+    when nothing could be salvaged from any other answer, so it is never cached as a search without results.
+    '''
+    if not text:
+        return []
+    text = strip_code_fences(text)
+    try:
+        return EVENT_LIST.dump_python(EVENT_LIST.validate_json(text))
+    except ValidationError:
+        pass
+
+    parser = EventStreamParser()
+    events = parser.feed(text)
+    metrics.increment('parse.salvaged_answers')
+    metrics.increment('parse.events_salvaged', len(events))
+    metrics.log('parse.salvaged', events = len(events), rejected = parser.rejected)
+    if not events:
+        metrics.increment('parse.unparseable_answers')
+        raise UnparseableAnswer(f'No event in the answer ({parser.rejected} rejected): {text[:80]}')
+    return events
+
+def load_event(text):
+    '''Parses a single event object, returns None when it is malformed.'''
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        # Trailing commas are the most common slip in otherwise valid objects.
+        return json.loads(_TRAILING_COMMA.sub(r'\1', text))
+    except ValueError:
+        metrics.log('parse.malformed_event', text = text[:80])
+        return None
+
+def validate_event(event):
+    '''Returns the event as a dictionary of the EventInfo fields, or None when it is not a valid event.'''
+    try:
+        return EventInfo.model_validate(event).model_dump()
+    except ValidationError:
+        return None
+
+class EventStreamParser:
+    '''
+    Incremental parser for a streamed JSON array of events.
+    Feed it text chunks as they arrive; every event object is returned as soon as its closing brace is seen,
+    so the UI can render the first event long before the model has finished the array.
+    Objects that are not valid JSON or do not match EventInfo are skipped and counted in rejected.
+    '''
+
+    def __init__(self):
+        self._buffer = [] # Characters of the object currently being read
+        self._depth = 0 # Brace depth, 0 while between objects
+        self._in_string = False
+        self._escaped = False
+        self.rejected = 0 # Complete objects dropped as malformed or not matching EventInfo
+        self.found = 0 # Events returned so far
+        self._text = [] # Text fed before the first event, checked by close()
+
+    def feed(self, chunk):
+        '''Consumes a chunk of text and returns the list of event objects completed by it.'''
+        events = []
+        if not self.found:
+            self._text.append(chunk)
+        for char in chunk:
+            if self._depth == 0:
+                # Anything between objects (the array brackets, commas, code fences) is skipped.
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    event = validate_event(load_event(''.join(self._buffer)))
+                    if event is not None:
+                        events.append(event)
+                    else:
+                        self.rejected += 1
+                        metrics.increment('parse.events_rejected')
+        if events:
+            self.found += len(events)
+            self._text = []
+        return events
+
+    def close(self):
+        '''Ends the stream; raises UnparseableAnswer when it held no event and was not an empty answer or array.'''
+        if self.found:
+            return
+        text = strip_code_fences(''.join(self._text))
+        try:
+            if not text or EVENT_LIST.validate_json(text) == []:
+                return
+        except ValidationError:
+            pass
+        metrics.increment('parse.unparseable_answers')
+        raise UnparseableAnswer(f'No event in the streamed answer ({self.rejected} rejected): {text[:80]}')
+
+def iter_events(chunks):
+    '''Yields event dictionaries from an iterable of streamed text chunks; raises UnparseableAnswer as parse_events.'''
+    parser = EventStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+# Search agent (ADK) markdown output: one bullet per event with a bolded name followed by
+# "Date(s) & Time", "Source Link", "Brief Description" and "Location" fields.
+_MARKDOWN_LINK = re.compile(r'\[([^\]]*)\]\((https?://[^)\s]+)\)')
+_BARE_URL = re.compile(r'https?://[^\s)\]>]+')
+_COORDINATES = re.compile(r'(-?\d{1,3}(?:\.\d+)?)\s*°?\s*[NSns]?\s*,\s*(-?\d{1,3}(?:\.\d+)?)')
+_FIELD = re.compile(r'^\W*\**\s*([A-Za-z][A-Za-z()/& ]*?)\s*:\s*\**\s*:?\s*(.*)$')
+_BULLET = re.compile(r'^\s*(?:[-*+]|\d+\.)\s+(.*)$')
+_HEADING = re.compile(r'^\s*#{1,6}\s*(.+?)\s*#*\s*$')
+_FIELD_NAMES = {
+    'date': 'date',
+    'time': 'date',
+    'link': 'source_link',
+    'source': 'source_link',
+    'description': 'description',
+    'location': 'location',
+    'coordinates': 'location',
+}
+
+def _field_name(label):
+    label = label.lower()
+    for keyword, field in _FIELD_NAMES.items():
+        if keyword in label:
+            return field
+    return None
+
+def _clean(text):
+    return text.replace('**', '').strip().strip('*').strip()
+
+def parse_markdown_events(text):
+    '''
+    Deterministic parser for the ADK search agent's bulleted event list.
+    Returns a list of dictionaries matching concierge.agent_adk.EventInfo, or None when the text does not
+    follow the expected format closely enough (no events, or an event missing one of its fields).
+    '''
+    if not text:
+        return None
+
+    events = []
+    current = None
+    category = ''
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            category = _clean(heading.group(1)).rstrip(':')
+            continue
+
+        bullet = _BULLET.match(line)
+        content = bullet.group(1) if bullet else line
+        field = _FIELD.match(content)
+        name = _field_name(field.group(1)) if field else None
+
+        if name and current is not None and not (content.startswith('**') and current.get(name)):
+            value = field.group(2).strip()
+            if name == 'source_link':
+                link = _MARKDOWN_LINK.search(value)
+                url = _BARE_URL.search(value)
+                value = link.group(0) if link else (url.group(0) if url else '')
+            elif name == 'location':
+                coordinates = _COORDINATES.search(value)
+                value = f"{coordinates.group(1)}, {coordinates.group(2)}" if coordinates else ''
+            else:
+                value = _clean(value)
+            current[name] = value
+        elif content.startswith('**'):
+            # A bolded line that is not a (new) field starts a new event.
+            current = {'event_type': category, 'event_name': _clean(content).rstrip(':')}
+            events.append(current)
+        elif not bullet and not name and line.endswith(':'):
+            # Plain "Jazz:" style lines group the events below them.
+            category = _clean(line).rstrip(':')
+
+    required = ('event_name', 'date', 'source_link', 'description', 'location')
+    if not events or any(not event.get(key) for event in events for key in required):
+        return None
+    return events
+
+def adk_event_fields(event):
+    '''
+    Maps an event of the ADK pipeline (event_type, date, source_link as a markdown link, description, location)
+    onto the EventInfo fields used by the search pipeline and the event store.
+    '''
+    source = str(event.get('source_link') or '')
+    link = _MARKDOWN_LINK.search(source)
+    url = _BARE_URL.search(source)
+    return {
+        'event_category': str(event.get('event_type') or ''),
+        'event_name': str(event.get('event_name') or ''),
+        'event_source_link': link.group(2) if link else (url.group(0) if url else ''),
+        'event_date': str(event.get('date') or ''),
+        'event_location': str(event.get('location') or ''),
+        'event_description': str(event.get('description') or ''),
+    }
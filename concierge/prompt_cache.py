@@ -0,0 +1,205 @@
+# Standard Libraries
+import time
+import hashlib
+import logging
+import threading
+
+# Custom Modules
+from config.settings import (PROMPT_CACHE_ENABLED, PROMPT_CACHE_TTL, PROMPT_CACHE_RENEW_BEFORE, PROMPT_CACHE_RETRY_AFTER,
+                             PROMPT_CACHE_MIN_TOKENS, PROMPT_CACHE_DEFAULT_MIN_TOKENS)
+from utils.metrics import metrics
+
+DISPLAY_NAME_PREFIX = 'locale-concierge-'
+
+def cache_key(model, instruction):
+    '''Identifies the cached content of a (model, instruction) pair; either one changing invalidates the cache.'''
+    return hashlib.sha1(f'{model}\0{instruction}'.encode('utf-8')).hexdigest()[:16]
+
+def min_cache_tokens(model, min_tokens = PROMPT_CACHE_MIN_TOKENS):
+    '''The model's minimum cacheable size in tokens (the first matching model name prefix of min_tokens).'''
+    name = model.rsplit('/', 1)[-1]
+    return next((tokens for prefix, tokens in min_tokens.items() if name.startswith(prefix)), PROMPT_CACHE_DEFAULT_MIN_TOKENS)
+
+class PromptCache:
+    '''
+    Explicit Gemini context cache holding the static part of every search request (system instruction and tools).
+    Created lazily on the first request, its TTL renewed shortly before it expires, and replaced when the model or the
+    instruction changes. An instruction below the model's minimum cacheable size is never cached (counted once with
+    count_tokens); when the API refuses to create the cache anyway, creation is retried after retry_after seconds.
+    Every API call runs on a background thread, one at a time: requests never wait on them (they hold rate limiter
+    slots), they go uncached until the cache exists and keep using it while it is renewed.
+    '''
+
+    def __init__(self, enabled = PROMPT_CACHE_ENABLED, ttl = PROMPT_CACHE_TTL, renew_before = PROMPT_CACHE_RENEW_BEFORE, retry_after = PROMPT_CACHE_RETRY_AFTER,
+                 min_tokens = PROMPT_CACHE_MIN_TOKENS):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.renew_before = renew_before
+        self.retry_after = retry_after
+        self.min_tokens = min_tokens
+        self._client = None
+        self._key = None
+        self._name = None
+        self._expires = 0.0
+        self._failed_until = 0.0
+        self._too_small = set() # Keys whose instruction is below the model's minimum cacheable size
+        self._busy = False # A background thread is creating or renewing the cache
+        self._idle = threading.Event()
+        self._idle.set()
+        self._generation = 0 # Bumped on a client change, so a create or renew still running for the old client is dropped
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'created': 0, 'reused': 0, 'renewed': 0, 'invalidated': 0, 'failed': 0, 'too_small': 0, 'uncached': 0}
+
+    def get(self, client, model, instruction, tools = None):
+        '''
+        Returns the name of a live cache for (model, instruction, tools), or None when requests must carry them uncached.
+        Never calls the API itself: a missing or expiring cache is created or renewed in the background.
+        '''
+        if not self.enabled:
+            return None
+        key = cache_key(model, instruction)
+        stale = None
+        with self._lock:
+            if client is not self._client:
+                # Cache names belong to one client (e.g. the benchmarks' fake), start over without touching the old one.
+                self._client, self._name, self._key, self._failed_until, self._busy = client, None, None, 0.0, False
+                self._generation += 1
+                self._idle.set()
+            if self._name is not None and self._key != key:
+                stale, self._name = self._name, None
+                self.stats['invalidated'] += 1
+            now = time.monotonic()
+            if self._name is not None and now >= self._expires:
+                self._name = None
+            name = self._name
+            refresh = not self._busy and key not in self._too_small and (
+                now >= self._failed_until if name is None else self._expires - now < self.renew_before
+            )
+            if refresh:
+                self._busy = True
+                self._idle.clear()
+            self.stats['hits' if name else 'uncached'] += 1
+            generation = self._generation
+
+        if stale is not None or refresh:
+            threading.Thread(
+                target = self._refresh, args = (client, model, instruction, tools, key, name if refresh else None, refresh, stale, generation, now),
+                name = 'prompt-cache', daemon = True
+            ).start()
+        return name
+
+    def wait(self, timeout = None):
+        '''Waits for the background create or renew in progress, if any; returns False on timeout.'''
+        return self._idle.wait(timeout)
+
+    def _refresh(self, client, model, instruction, tools, key, name, refresh, stale, generation, now):
+        if stale is not None:
+            self._delete(client, stale)
+        if not refresh:
+            return
+        too_small = failed = False
+        try:
+            if name is not None and not self._renew(client, name):
+                name = None
+            if name is None:
+                too_small = self._below_minimum(client, model, instruction)
+                if not too_small:
+                    name = self._create(client, model, instruction, tools, key)
+                    failed = name is None
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    self._busy = False
+                    self._name, self._key = name, key
+                    if too_small:
+                        self._too_small.add(key)
+                    if failed:
+                        self._failed_until = now + self.retry_after
+                    if name is not None:
+                        self._expires = now + self.ttl
+                    self._idle.set()
+
+    def invalidate(self):
+        '''Forgets the current cache, e.g. after the API reported it missing; the next request creates a new one.'''
+        with self._lock:
+            if self._name is not None:
+                self.stats['invalidated'] += 1
+            self._name = None
+
+    def snapshot(self):
+        '''Current cache name, seconds until it expires and counters.'''
+        with self._lock:
+            return dict(
+                self.stats,
+                enabled = self.enabled,
+                name = self._name,
+                expires_in = max(0.0, self._expires - time.monotonic()) if self._name else None,
+            )
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _below_minimum(self, client, model, instruction):
+        # True when the instruction is too small to be cached; the count is only made once per (model, instruction).
+        minimum = min_cache_tokens(model, self.min_tokens)
+        try:
+            tokens = client.models.count_tokens(model = model, contents = instruction).total_tokens
+        except Exception as e:
+            # Let the create call decide.
+            metrics.log('prompt_cache.count_failed', model = model, error = repr(e))
+            return False
+        if tokens is None or tokens >= minimum:
+            return False
+        self._count('too_small')
+        metrics.log('prompt_cache.below_minimum', model = model, tokens = tokens, min_tokens = minimum)
+        return True
+
+    def _create(self, client, model, instruction, tools, key):
+        # Returns the name of the new (or reused) cache, None when the API refused it.
+        from google.genai import types
+
+        display_name = DISPLAY_NAME_PREFIX + key
+        try:
+            with metrics.span('prompt_cache.create'):
+                # Another app process may already hold a cache for the same model and instruction.
+                cached = next((cached for cached in client.caches.list() if cached.display_name == display_name and (cached.model or '').endswith(model)), None)
+                if cached is not None:
+                    client.caches.update(name = cached.name, config = types.UpdateCachedContentConfig(ttl = f'{self.ttl}s'))
+                    self._count('reused')
+                else:
+                    cached = client.caches.create(model = model, config = types.CreateCachedContentConfig(
+                        display_name = display_name,
+                        system_instruction = instruction,
+                        tools = tools,
+                        ttl = f'{self.ttl}s',
+                    ))
+                    self._count('created')
+        except Exception as e:
+            self._count('failed')
+            metrics.log('prompt_cache.create_failed', logging.WARNING, model = model, error = repr(e))
+            return None
+        return cached.name
+
+    def _renew(self, client, name):
+        # Returns whether the cache was renewed.
+        from google.genai import types
+
+        try:
+            with metrics.span('prompt_cache.renew'):
+                client.caches.update(name = name, config = types.UpdateCachedContentConfig(ttl = f'{self.ttl}s'))
+        except Exception as e:
+            # Most likely expired or deleted on the server, a new one is created right after.
+            metrics.log('prompt_cache.renew_failed', name = name, error = repr(e))
+            self._count('invalidated')
+            return False
+        self._count('renewed')
+        return True
+
+    def _delete(self, client, name):
+        try:
+            client.caches.delete(name = name)
+        except Exception as e:
+            metrics.log('prompt_cache.delete_failed', name = name, error = repr(e))
+
+prompt_cache = PromptCache()
@@ -26,4 +26,103 @@ def get_api_key():
     # Basic check to ensure the key is present and not the placeholder.
     if not api_key or "YOUR_GOOGLE_API_KEY" in api_key:
         return None
-    return api_key
\ No newline at end of file
+    return api_key
+
+# Search fan-out: one grounded Gemini call per interest, run concurrently instead of one call for every interest.
+SEARCH_FAN_OUT = True # Set to False to fall back to a single combined call for all interests.
+MAX_PARALLEL_SEARCHES = 8 # Upper bound on concurrent per-interest Gemini calls for a single search.
+
+# Search result cache (in-memory LRU in front of an on-disk SQLite table), shared by every session.
+SEARCH_CACHE_PATH = os.environ.get("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3") # Location of the on-disk cache tier.
+SEARCH_CACHE_TTL = 6 * 60 * 60 # Seconds a cached search result stays valid; event listings change slowly.
+SEARCH_CACHE_MEMORY_ENTRIES = 512 # Max entries kept in the in-memory LRU tier.
+SEARCH_CACHE_DISK_ENTRIES = 20000 # Max entries kept in the SQLite tier before the least recently used are evicted.
+SEARCH_STREAMING = True # Stream results and render each event card as soon as it arrives.
+
+# ADK session storage ("sqlite": bounded in-memory LRU written through to SQLite, "memory": ADK's unbounded InMemorySessionService).
+ADK_SESSION_BACKEND = os.environ.get("ADK_SESSION_BACKEND", "sqlite")
+ADK_SESSION_DB_PATH = os.environ.get("ADK_SESSION_DB_PATH", ".cache/adk_sessions.sqlite3") # Location of the persisted sessions.
+ADK_SESSION_MAX_IN_MEMORY = 200 # Sessions kept in memory; the least recently used are evicted (they stay on disk).
+ADK_SESSION_IDLE_TIMEOUT = 30 * 60 # Seconds without access before a session is evicted from memory.
+ADK_SESSION_MAX_EVENTS = 100 # Events kept per session; older ones are dropped so history cannot grow forever.
+ADK_SESSION_RETENTION = 7 * 24 * 60 * 60 # Seconds after the last update before a session is deleted from disk.
+
+# Date ranges are split into grid aligned windows that are searched and cached independently.
+DATE_WINDOW_SIZES = (1, 7, 28, 91, 364) # Candidate window sizes in days, the smallest one that fits MAX_DATE_WINDOWS is used.
+MAX_DATE_WINDOWS = 6 # Upper bound on windows (and therefore Gemini calls) per interest for one search.
+
+# Stage-level latency metrics (see utils/metrics.py and the Metrics page).
+METRICS_SAMPLE_WINDOW = 2048 # Most recent samples per stage used for the p50/p95/p99 latencies.
+METRICS_LOG_ENABLED = os.environ.get("METRICS_LOG_ENABLED", "1") == "1" # Emit one structured JSON log line per span and per logged event (warnings and errors are always logged).
+ADMIN_EMAILS = [email.strip() for email in os.environ.get("ADMIN_EMAILS", "").split(",") if email.strip()] # Users allowed to open the Metrics page, empty allows any logged in user.
+
+# Searches run as background jobs on a shared executor; the results panel polls them from a fragment.
+SEARCH_JOB_WORKERS = 16 # Searches (of any session) running at the same time; each fans out to MAX_PARALLEL_SEARCHES calls.
+SEARCH_POLL_INTERVAL = 0.5 # Seconds between refreshes of the results panel while a search is running.
+
+# Results panel rendering.
+EVENTS_PAGE_SIZE = 20 # Event cards rendered per page; the category filter and sort order apply before paging.
+
+# Local event store: every event found is kept in SQLite (FTS5, date and grid geo indexes) and answers covered searches before Gemini.
+EVENT_STORE_ENABLED = True # Set to False to always ask Gemini for searches the result cache does not hold.
+EVENT_STORE_PATH = os.environ.get("EVENT_STORE_PATH", ".cache/events.sqlite3") # Location of the event store.
+EVENT_STORE_COVERAGE_TTL = 3 * 24 * 60 * 60 # Seconds a searched (interest, location, window) is answered from the store.
+EVENT_STORE_RETENTION_DAYS = 30 # Events are deleted this many days after they ended.
+EVENT_STORE_CELL_DEGREES = 0.05 # Side of a geo index grid cell in degrees (about 5 km).
+EVENT_STORE_RADIUS_KM = 25 # Events stored under other spellings of a location are used within this distance of its centre.
+
+# Near-duplicate events (same event found by overlapping interests or windows) are merged.
+DEDUP_CELL_DEGREES = 0.01 # Spatial blocking cell in degrees (about 1 km); events are compared with their own and neighbouring cells.
+DEDUP_NAME_SIMILARITY = 0.85 # Minimum difflib ratio between two folded names for them to be the same event.
+
+# Interests are normalized before fan-out so spelling variants share one search, cache key and model call.
+DEFAULT_INTERESTS = ['Art', 'Jazz', "Farmer's Market", 'Theatre', 'Hiking', 'Disco'] # Options offered by the interests picker.
+INTEREST_ALIASES = { # Folded alias -> canonical interest
+    "jazz music": "Jazz", "live jazz": "Jazz",
+    "arts": "Art", "art exhibition": "Art", "art exhibitions": "Art", "exhibitions": "Art", "museums": "Art",
+    "farmers market": "Farmer's Market", "farmers markets": "Farmer's Market", "farmer's markets": "Farmer's Market", "food market": "Farmer's Market",
+    "theater": "Theatre", "plays": "Theatre",
+    "hike": "Hiking", "hikes": "Hiking", "trekking": "Hiking",
+    "disco music": "Disco", "clubbing": "Disco", "nightclubs": "Disco",
+}
+INTEREST_FUZZY_MATCHING = True # Also map typos of a known interest (e.g. "Theatr") onto it.
+INTEREST_FUZZY_CUTOFF = 0.85 # Minimum difflib ratio for a fuzzy match.
+INTEREST_FUZZY_MIN_LENGTH = 5 # Shorter interests (and known spellings) are never fuzzy matched: "Part" is not a typo of "Art".
+
+# Prefetch: warm the result cache for the most searched (interest, location) combos during off-peak hours.
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_INTERVAL = 30 * 60 # Seconds between prefetch runs.
+PREFETCH_JITTER = 5 * 60 # Uniform +/- jitter on the interval, so several app processes do not fire together.
+PREFETCH_OFF_PEAK_HOURS = (2, 6) # Local hours [start, end) in which prefetching may run.
+PREFETCH_DAILY_BUDGET = 200 # Max Gemini calls per day spent on prefetching.
+PREFETCH_TOP_COMBOS = 10 # Number of most searched combos to keep warm.
+PREFETCH_DAYS_AHEAD = 7 # Prefetched range: today plus this many days.
+PREFETCH_HALF_LIFE = 3 * 24 * 60 * 60 # Seconds after which a search counts half as much towards popularity.
+
+# Process wide scheduler in front of every Gemini call (see utils/rate_limit.py).
+MODEL_RATE_PER_SECOND = float(os.environ.get("MODEL_RATE_PER_SECOND", "5")) # Token bucket refill rate, i.e. sustained calls per second.
+MODEL_BURST = 10 # Token bucket size: calls that may start at once after an idle period.
+MODEL_MIN_RATE = 0.2 # Floor of the adaptive rate after repeated 429/503 responses.
+MODEL_MAX_IN_FLIGHT = int(os.environ.get("MODEL_MAX_IN_FLIGHT", "16")) # Max model calls (and ADK turns) running at the same time.
+MODEL_MAX_RETRIES = 4 # Retries of a call answered with 429/503.
+MODEL_BACKOFF_BASE = 1.0 # Seconds; the backoff of retry n is uniform in [0, base * 2^n].
+MODEL_BACKOFF_MAX = 30.0 # Upper bound of a single backoff, in seconds.
+
+# Explicit context cache for the static search instruction and tools (see concierge/prompt_cache.py).
+PROMPT_CACHE_ENABLED = os.environ.get("PROMPT_CACHE_ENABLED", "1") == "1"
+PROMPT_CACHE_TTL = 60 * 60 # Seconds a created cache lives on the Gemini side; renewed while searches keep using it.
+PROMPT_CACHE_RENEW_BEFORE = 5 * 60 # Renew the TTL once less than this many seconds are left.
+PROMPT_CACHE_RETRY_AFTER = 60 * 60 # Seconds before retrying a creation the API refused.
+PROMPT_CACHE_MIN_TOKENS = {'gemini-2.5-pro': 2048, 'gemini-2.5-flash': 1024} # Minimum cacheable size per model name prefix, smaller instructions are never cached.
+PROMPT_CACHE_DEFAULT_MIN_TOKENS = 1024 # Minimum cacheable size of models not listed above.
+
+# Structured output: ask for application/json with the EventInfo schema. Gemini 2.5 rejects JSON mode together with the
+# Google Search tool, so it stays off there and answers are validated (and salvaged when damaged) by concierge/parsing.py.
+SEARCH_JSON_MODE = os.environ.get("SEARCH_JSON_MODE", "0") == "1"
+
+# Tail latency: every search has a deadline, and slow model calls are hedged with a duplicate (see utils/hedge.py).
+SEARCH_DEADLINE = float(os.environ.get("SEARCH_DEADLINE", "45")) # Seconds after which a search returns what it has, flagging the interests still missing.
+HEDGE_ENABLED = True # Send a duplicate of a model call that runs past the HEDGE_PERCENTILE latency; the first answer wins.
+HEDGE_PERCENTILE = 0.95 # Latency percentile (of the recent calls) after which a call is hedged.
+HEDGE_MIN_SAMPLES = 20 # Calls observed before hedging starts, the percentile is meaningless before.
+HEDGE_MIN_DELAY = 5.0 # Floor of the hedging delay in seconds, so a burst of fast calls cannot make hedging fire on everything.
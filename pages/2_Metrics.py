@@ -0,0 +1,109 @@
+import json
+
+import streamlit as st
+import pandas as pd
+
+from config.settings import ADMIN_EMAILS
+from utils.metrics import metrics
+from services.search_cache import get_search_cache
+from services.event_store import get_event_store
+from services.search_service import coalescing_stats
+from services.prefetch import query_stats, get_prefetch_scheduler
+from concierge.agent_adk import formatter_stats
+from utils.rate_limit import model_scheduler
+from concierge.prompt_cache import prompt_cache
+from services.concierge_service import get_adk_runner
+from services.session_store import BoundedSessionService
+
+
+st.set_page_config(page_title = 'Metrics', layout = 'wide')
+
+# Admin only: logged in, and listed in ADMIN_EMAILS when that is set.
+if not st.user.is_logged_in:
+    st.warning('Please log in to view the metrics.')
+    st.stop()
+if ADMIN_EMAILS and st.user.email not in ADMIN_EMAILS:
+    st.error('The metrics page is restricted to administrators.')
+    st.stop()
+
+st.title('Metrics')
+st.caption('Per-stage latencies and counters of this app process since it started (latencies in milliseconds).')
+
+if st.button('Refresh'):
+    st.rerun()
+
+snapshot = metrics.snapshot()
+
+st.header('Stage latency', divider = 'violet')
+if snapshot['stages']:
+    stages = pd.DataFrame.from_dict(snapshot['stages'], orient = 'index')
+    stages[['mean', 'p50', 'p95', 'p99', 'max']] *= 1000
+    st.dataframe(stages.sort_index().round(1), use_container_width = True)
+else:
+    st.info('No spans recorded yet, run a search first.')
+
+st.header('Tokens & errors', divider = 'violet')
+counters = snapshot['counters']
+if counters:
+    st.dataframe(pd.Series(counters, name = 'value').sort_index(), use_container_width = True)
+else:
+    st.info('No counters recorded yet.')
+
+st.header('Model rate limiter', divider = 'violet')
+scheduler_stats = model_scheduler.snapshot()
+queued_col, in_flight_col, rate_col = st.columns(3)
+queued_col.metric('Queued calls', sum(scheduler_stats['queue_depth'].values()))
+in_flight_col.metric('In flight', scheduler_stats['in_flight'])
+rate_col.metric('Rate (calls/s)', f"{scheduler_stats['rate']:.2f}")
+st.json(scheduler_stats)
+
+st.header('Caches', divider = 'violet')
+cache_col, store_col, flight_col, formatter_col, prompt_col = st.columns(5)
+cache_stats = get_search_cache().snapshot()
+store_stats = get_event_store().snapshot()
+with cache_col:
+    st.subheader('Search cache')
+    st.metric('Hit rate', f"{cache_stats['hit_rate']:.0%}")
+    st.json(cache_stats)
+with store_col:
+    st.subheader('Event store')
+    st.metric('Stored events', store_stats['events'])
+    st.json(store_stats)
+with flight_col:
+    st.subheader('Request coalescing')
+    st.json(coalescing_stats())
+with formatter_col:
+    st.subheader('ADK local formatter')
+    st.json(formatter_stats())
+with prompt_col:
+    st.subheader('Prompt context cache')
+    st.metric('Cached prompt tokens', counters.get('tokens.cached', 0))
+    st.json(prompt_cache.snapshot())
+
+st.header('ADK sessions', divider = 'violet')
+session_service = get_adk_runner().session_service
+# Only the bounded SQLite backend keeps session metrics (ADK_SESSION_BACKEND = "memory" has none).
+session_stats = session_service.snapshot() if isinstance(session_service, BoundedSessionService) else None
+if session_stats is None:
+    st.info(f'No session metrics for the {type(session_service).__name__} backend (ADK_SESSION_BACKEND).')
+else:
+    memory_col, disk_col, evicted_col = st.columns(3)
+    memory_col.metric('Sessions in memory', session_stats['sessions_in_memory'], help = f"About {session_stats['approx_memory_bytes'] / 1e6:.1f} MB")
+    disk_col.metric('Sessions on disk', session_stats['sessions_on_disk'])
+    evicted_col.metric('Evictions', session_stats['lru_evictions'] + session_stats['idle_evictions'])
+    st.json(session_stats)
+
+st.header('Prefetch', divider = 'violet')
+scheduler = get_prefetch_scheduler()
+if scheduler is None:
+    st.info('Prefetching is disabled (PREFETCH_ENABLED).')
+else:
+    st.metric('Calls left today', scheduler.budget_left())
+st.dataframe(pd.DataFrame(query_stats.top(20), columns = ['interest', 'location']), use_container_width = True)
+
+st.download_button(
+    'Download JSON',
+    json.dumps({'metrics': snapshot, 'search_cache': cache_stats, 'event_store': store_stats, 'coalescing': coalescing_stats(), 'rate_limiter': scheduler_stats, 'formatter': formatter_stats(), 'prompt_cache': prompt_cache.snapshot(), 'adk_sessions': session_stats}, indent = 2),
+    file_name = 'locale_metrics.json',
+    mime = 'application/json'
+)
@@ -1,100 +1,100 @@
 import streamlit as st
-import asyncio
 import time
 import os
-from google.adk.sessions import InMemorySessionService
+import logging
+import concurrent.futures
 from google.adk.runners import Runner
 from google.genai import types as genai_types
 
-# from concierge.agent import root_agent
+from concierge.agent_adk import root_agent, build_root_agent, rate_limit_plugin
+from concierge.parsing import adk_event_fields
 
-from config.settings import APP_NAME_FOR_ADK, USER_ID, INITIAL_STATE, ADK_SESSION_KEY
+from config.settings import APP_NAME_FOR_ADK, USER_ID, INITIAL_STATE, ADK_SESSION_KEY, EVENT_STORE_ENABLED, SEARCH_DEADLINE
 
-# Import nest_asyncio at the top of the file
-import nest_asyncio
-nest_asyncio.apply()  # Apply nest_asyncio to allow nested event loops
+from services.event_loop import BackgroundEventLoop
+from services.event_store import get_event_store
+from services.session_store import create_session_service
+from utils.interests import canonical_interests
+from utils.metrics import metrics
 
 @st.cache_resource
-def initialize_adk():
+def get_adk_event_loop():
+    """
+    Starts the single long-lived event loop every ADK coroutine of the process runs on.
+    Replaces creating a new loop (and patching it with nest_asyncio) on every rerun.
+    """
+    metrics.log('adk.event_loop_started')
+    return BackgroundEventLoop()
+
+@st.cache_resource
+def get_adk_runner():
     """
-    Initializes the Google ADK Runner and manages the ADK session.
-    Uses Streamlit's cache_resource to ensure this runs only once per app load.
+    Creates the Google ADK Runner and its session service.
+    Uses Streamlit's cache_resource so a single runner is shared by every session of the app.
     """
-    print("DEBUG: Initializing ADK runner and session service")
+    metrics.log('adk.runner_created')
     agent = root_agent # Create our ADK agent defined earlier.
-    session_service = InMemorySessionService() # ADK's default in-memory session service for storing session data.
+    session_service = create_session_service() # Bounded, persistent session store (see ADK_SESSION_BACKEND).
     runner = Runner( # The ADK Runner orchestrates the agent's execution.
         agent=agent,
         app_name=APP_NAME_FOR_ADK,
-        session_service=session_service
+        session_service=session_service,
+        plugins=[rate_limit_plugin] # Every model call goes through the process wide rate limiter.
     )
-    
-    print(f"DEBUG: Checking for existing session ID in st.session_state[{ADK_SESSION_KEY}]")
+    return runner
+
+def submit(coro):
+    """
+    Schedules a coroutine on the shared ADK event loop and returns a concurrent.futures.Future,
+    so calls from many sessions overlap on one loop.
+    """
+    return get_adk_event_loop().submit(coro)
+
+async def ensure_session(session_service, session_id: str):
+    """
+    Creates the ADK session if the session service does not know it (new visitor, or the app was restarted).
+    """
+    session = await session_service.get_session(app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id)
+    if not session:
+        metrics.log('adk.session_created', session_id=session_id)
+        session = await session_service.create_session(
+            app_name=APP_NAME_FOR_ADK,
+            user_id=USER_ID,
+            session_id=session_id,
+            state=INITIAL_STATE, # Initialize with predefined state.
+        )
+    return session
+
+def initialize_adk():
+    """
+    Returns the shared ADK runner and the ADK session ID of the current Streamlit session,
+    creating the session on first use.
+    """
+    runner = get_adk_runner()
+
     # Check if an ADK session ID already exists in Streamlit's session state.
     if ADK_SESSION_KEY not in st.session_state:
-        print("DEBUG: No existing session ID found, creating new session")
         # If not, create a new unique session ID and store it.
         session_id = f"streamlit_adk_session_{int(time.time())}_{os.urandom(4).hex()}"
-        print(f"DEBUG: Generated new session ID: {session_id}")
+        metrics.log('adk.session_id_generated', session_id=session_id)
         st.session_state[ADK_SESSION_KEY] = session_id
-        
-        # Create a new session in ADK's session service.
-        print(f"DEBUG: Creating new session in ADK session service: {session_id}")
-        # Since create_session is async, we need to run it in an event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(
-            session_service.create_session(
-                app_name=APP_NAME_FOR_ADK,
-                user_id=USER_ID,
-                session_id=session_id,
-                state=INITIAL_STATE, # Initialize with predefined state.
-            )
-        )
-        print(f"DEBUG: Session created successfully: {session_id}")
-    else:
-        # If an ADK session ID already exists (e.g., on a Streamlit rerun), retrieve it.
-        session_id = st.session_state[ADK_SESSION_KEY]
-        print(f"DEBUG: Found existing session ID: {session_id}")
-        
-        # Verify if the session still exists in the ADK session service.
-        print(f"DEBUG: Checking if session exists in ADK session service: {session_id}")
-        # get_session might also be async, so handle it properly
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        session_exists = loop.run_until_complete(
-            session_service.get_session(app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id)
-        )
-        
-        if not session_exists:
-            print(f"DEBUG: Session not found in ADK service, recreating: {session_id}")
-            # If the session was lost (e.g., full app restart without clearing cache), recreate it.
-            loop.run_until_complete(
-                session_service.create_session(
-                    app_name=APP_NAME_FOR_ADK,
-                    user_id=USER_ID,
-                    session_id=session_id,
-                    state=INITIAL_STATE
-                )
-            )
-            print(f"DEBUG: Session recreated successfully: {session_id}")
-        else:
-            print(f"DEBUG: Session exists in ADK service: {session_id}")
+    session_id = st.session_state[ADK_SESSION_KEY]
+
+    # Create (or recreate after a restart) the session on the shared loop.
+    submit(ensure_session(runner.session_service, session_id)).result()
     return runner, session_id
 
 async def run_adk_async(runner: Runner, session_id: str, user_message_text: str):
     """
     Asynchronously runs a single turn of the ADK agent conversation.
     """
-    print(f"DEBUG: Attempting to get session with ID: {session_id}")
-    print(f"DEBUG: App name: {APP_NAME_FOR_ADK}, User ID: {USER_ID}")
+    metrics.log('adk.session_lookup', session_id=session_id, app_name=APP_NAME_FOR_ADK, user_id=USER_ID)
     
     # Check if session exists in the session service - properly await the async call
     session = await runner.session_service.get_session(app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id)
     if not session:
-        print(f"ERROR: Session not found in session service: {session_id}")
+        metrics.log('adk.session_missing', logging.ERROR, session_id=session_id)
         # Try to recreate the session before failing - properly await the async call
-        print(f"DEBUG: Attempting to recreate session: {session_id}")
         await runner.session_service.create_session(
             app_name=APP_NAME_FOR_ADK,
             user_id=USER_ID,
@@ -105,36 +105,54 @@ async def run_adk_async(runner: Runner, session_id: str, user_message_text: str)
         session = await runner.session_service.get_session(app_name=APP_NAME_FOR_ADK, user_id=USER_ID, session_id=session_id)
         if not session:
             return "Error: ADK session not found and could not be recreated."
-        print(f"DEBUG: Session recreated successfully: {session_id}")
+        metrics.log('adk.session_recreated', session_id=session_id)
     # Prepare the user's message in the format expected by ADK/Gemini.
     content = genai_types.Content(role='user', parts=[genai_types.Part(text=user_message_text)])
     final_response_text = "[Agent encountered an issue]" # Default error message
     # Iterate through the asynchronous events generated by the ADK runner.
     # ADK can yield multiple events (e.g., tool calls, interim responses) before the final response.
-    async for event in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
-        if event.is_final_response(): # We are only interested in the final response from the agent.
-            if event.content and event.content.parts and hasattr(event.content.parts[0], 'text'):
-                final_response_text = event.content.parts[0].text
-            break # Exit the loop once the final response is received.
+    # Every stage of the SequentialAgent ends with a final response, so keep the last one (the formatter's).
+    # The turn scope gives back the rate limiter slots of model calls a cancelled turn leaves behind.
+    with metrics.span('adk.run', session_id=session_id), rate_limit_plugin.turn():
+        async for event in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
+            metrics.record_usage(event.usage_metadata, prefix='adk_tokens')
+            formatted_events = event.actions.state_delta.get('formatted_events') if event.actions else None
+            if EVENT_STORE_ENABLED and isinstance(formatted_events, list):
+                # Keep what the pipeline found for later searches (no coverage: the location and dates are free text here).
+                get_event_store().add([adk_event_fields(item) for item in formatted_events if isinstance(item, dict)])
+            if event.is_final_response(): # We are only interested in the final response from the agent.
+                if event.content and event.content.parts and hasattr(event.content.parts[0], 'text'):
+                    final_response_text = event.content.parts[0].text
     return final_response_text
 
-def run_adk_sync(runner: Runner, session_id: str, user_message_text: str) -> str:
+def build_interest_runner(runner: Runner, interests: list[str]) -> Runner:
+    """
+    Creates a runner for a single request whose root agent searches every interest in parallel.
+    It shares the session service with the cached runner, so the conversation history is kept.
+    """
+    return Runner(
+        agent=build_root_agent(canonical_interests(interests)), # One search agent per distinct interest
+        app_name=APP_NAME_FOR_ADK,
+        session_service=runner.session_service,
+        plugins=[rate_limit_plugin]
+    )
+
+def run_adk_sync(runner: Runner, session_id: str, user_message_text: str, interests: list[str] = None, timeout: float = SEARCH_DEADLINE) -> str:
     """
     Synchronous wrapper for running ADK, as Streamlit does not directly support async calls in the main thread.
+    When interests are given, the turn runs one parallel search sub-agent per interest.
+    A turn still running after timeout seconds is cancelled.
     """
-    print(f"DEBUG: Starting synchronous ADK run with session ID: {session_id}")
+    metrics.log('adk.run_started', session_id=session_id, interests=len(interests or []))
+    if interests:
+        runner = build_interest_runner(runner, interests)
     
-    # Check if we have an existing event loop
+    # Run on the shared background loop, the script thread only waits for the result.
+    future = submit(run_adk_async(runner, session_id, user_message_text))
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            print("DEBUG: Using existing running event loop")
-            # Use nest_asyncio to run in existing loop
-            return loop.run_until_complete(run_adk_async(runner, session_id, user_message_text))
-        else:
-            print("DEBUG: Using existing non-running event loop")
-            return loop.run_until_complete(run_adk_async(runner, session_id, user_message_text))
-    except RuntimeError:
-        print("DEBUG: No event loop found, creating new one")
-        # No event loop exists, create a new one
-        return asyncio.run(run_adk_async(runner, session_id, user_message_text))
\ No newline at end of file
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel() # Cancels the task on the loop and its pending model calls; the rate limiter turn gives their slots back
+        metrics.increment('adk.deadline_exceeded')
+        metrics.log('adk.deadline_exceeded', logging.ERROR, session_id=session_id, deadline_s=timeout)
+        return "[The agent did not answer in time, please try again]"
@@ -0,0 +1,37 @@
+# Standard Libraries
+import asyncio
+import threading
+
+class BackgroundEventLoop:
+    '''
+    A single long-lived asyncio event loop running in a dedicated daemon thread.
+    Script threads hand coroutines over with submit() and get a concurrent.futures.Future back,
+    so async calls from many Streamlit sessions overlap on one loop instead of each creating its own.
+    '''
+
+    def __init__(self, name = 'adk-event-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target = self._run, name = name, daemon = True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        '''Schedules the coroutine on the loop and returns a concurrent.futures.Future for its result.'''
+        if threading.current_thread() is self._thread:
+            # Blocking on the result from inside the loop thread would deadlock.
+            coro.close()
+            raise RuntimeError('BackgroundEventLoop.submit() cannot be called from the loop thread itself.')
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout = None):
+        '''Runs the coroutine on the loop and blocks the calling thread until it finishes.'''
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        '''Stops the loop and waits for its thread to exit.'''
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,259 @@
+# Standard Libraries
+import os
+import re
+import math
+import time
+import sqlite3
+import datetime
+import threading
+
+# Custom Modules
+from config.settings import EVENT_STORE_PATH, EVENT_STORE_COVERAGE_TTL, EVENT_STORE_RETENTION_DAYS, EVENT_STORE_CELL_DEGREES, EVENT_STORE_RADIUS_KM
+from utils.query import normalize_text, normalize_date_range, parse_event_dates, parse_coordinates
+from utils.dedup import canonical_key, canonical_name, similar_names, dates_overlap
+
+EVENT_FIELDS = ('event_category', 'event_name', 'event_source_link', 'event_date', 'event_location', 'event_description')
+
+def fts_query(text):
+    '''FTS5 MATCH expression requiring every word of text, e.g. "Farmer's Market" -> "farmer" "s" "market".'''
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', normalize_text(text)))
+
+class EventStore:
+    '''
+    Persistent store of every event the model has found, shared by every session.
+    events_fts (FTS5 over name, description, category and the interests it was found for), the date
+    index on (start_day, end_day) and the grid index on (cell_lat, cell_lon) answer later searches locally.
+    Events are keyed by canonical_key, and near-duplicates found in the neighbouring cells update the stored event.
+    The coverage table records which (interest, location, window) searches have been run against Gemini,
+    a search is only answered from the store while every interest of it is covered.
+    '''
+
+    def __init__(self, path = EVENT_STORE_PATH, coverage_ttl = EVENT_STORE_COVERAGE_TTL, retention_days = EVENT_STORE_RETENTION_DAYS,
+                 cell_degrees = EVENT_STORE_CELL_DEGREES, radius_km = EVENT_STORE_RADIUS_KM):
+        self.coverage_ttl = coverage_ttl
+        self.retention_days = retention_days
+        self.cell_degrees = cell_degrees
+        self.radius_km = radius_km
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.stats = {'upserts': 0, 'answered': 0, 'uncovered': 0, 'purged': 0}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        # One connection shared by every Streamlit session thread, access is serialized by the lock.
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(
+            '''CREATE TABLE IF NOT EXISTS events (
+                   id INTEGER PRIMARY KEY,
+                   event_key TEXT NOT NULL UNIQUE,
+                   name TEXT NOT NULL,
+                   category TEXT NOT NULL,
+                   description TEXT NOT NULL,
+                   tags TEXT NOT NULL DEFAULT '',
+                   date_text TEXT NOT NULL,
+                   start_day INTEGER,
+                   end_day INTEGER,
+                   location_text TEXT NOT NULL,
+                   lat REAL,
+                   lon REAL,
+                   cell_lat INTEGER,
+                   cell_lon INTEGER,
+                   source_link TEXT NOT NULL,
+                   location TEXT,
+                   updated_at REAL NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS idx_events_dates ON events (start_day, end_day);
+               CREATE INDEX IF NOT EXISTS idx_events_cell ON events (cell_lat, cell_lon);
+               CREATE INDEX IF NOT EXISTS idx_events_location ON events (location);
+
+               CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+                   name, description, category, tags,
+                   content = 'events', content_rowid = 'id', tokenize = 'unicode61 remove_diacritics 2'
+               );
+               CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+                   INSERT INTO events_fts (rowid, name, description, category, tags) VALUES (new.id, new.name, new.description, new.category, new.tags);
+               END;
+               CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+                   INSERT INTO events_fts (events_fts, rowid, name, description, category, tags) VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+               END;
+               CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE ON events BEGIN
+                   INSERT INTO events_fts (events_fts, rowid, name, description, category, tags) VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+                   INSERT INTO events_fts (rowid, name, description, category, tags) VALUES (new.id, new.name, new.description, new.category, new.tags);
+               END;
+
+               CREATE TABLE IF NOT EXISTS coverage (
+                   interest TEXT NOT NULL,
+                   location TEXT NOT NULL,
+                   window_start INTEGER NOT NULL,
+                   window_end INTEGER NOT NULL,
+                   searched_at REAL NOT NULL,
+                   PRIMARY KEY (interest, location, window_start, window_end)
+               );'''
+        )
+        self._db.commit()
+
+    def add(self, events, interest = None, location = None, window = None):
+        '''
+        Upserts the events. With interest, location and window (a completed Gemini search)
+        the events are tagged with the interest and the search is recorded as covered.
+        '''
+        now = time.time()
+        location = normalize_text(location) or None
+        with self._lock:
+            for event in events:
+                self._upsert(event, normalize_text(interest), location, now)
+            if interest is not None and window is not None:
+                start, end = normalize_date_range(window)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO coverage (interest, location, window_start, window_end, searched_at) VALUES (?, ?, ?, ?, ?)',
+                    (normalize_text(interest), location or '', start.toordinal(), end.toordinal(), now)
+                )
+            self._purge(now)
+            self._db.commit()
+            self.stats['upserts'] += len(events)
+
+    def answer(self, subject, location, window):
+        '''
+        Events for a search task (subject is one interest or a tuple of interests) from the store,
+        or None when some interest has not been searched for this location and window recently.
+        '''
+        interests = [subject] if isinstance(subject, str) else list(subject)
+        start, end = normalize_date_range(window)
+        location = normalize_text(location)
+        with self._lock:
+            for interest in interests:
+                row = self._db.execute(
+                    # Any recent search of a window enclosing this one covers it (e.g. a prefetched week covers each of its days)
+                    'SELECT 1 FROM coverage WHERE interest = ? AND location = ? AND window_start <= ? AND window_end >= ? AND searched_at > ? LIMIT 1',
+                    (normalize_text(interest), location, start.toordinal(), end.toordinal(), time.time() - self.coverage_ttl)
+                ).fetchone()
+                if row is None:
+                    self.stats['uncovered'] += 1
+                    return None
+
+            events, seen = [], set()
+            for interest in interests:
+                for event in self._query(interest, location, start, end):
+                    if event['event_key'] not in seen:
+                        seen.add(event['event_key'])
+                        events.append({field: event[field] for field in EVENT_FIELDS})
+            self.stats['answered'] += 1
+            return events
+
+    def snapshot(self):
+        '''Returns the counters together with the number of stored events and covered searches.'''
+        with self._lock:
+            events = self._db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+            coverage = self._db.execute('SELECT COUNT(*) FROM coverage').fetchone()[0]
+            return dict(self.stats, events = events, covered_searches = coverage)
+
+    def _upsert(self, event, interest, location, now):
+        dates = parse_event_dates(event.get('event_date'))
+        coordinates = parse_coordinates(event.get('event_location'))
+        lat, lon = coordinates if coordinates else (None, None)
+        cell_lat, cell_lon = self._cell(lat, lon) if coordinates else (None, None)
+        key = self._existing_key(event, dates, cell_lat, cell_lon) or canonical_key(event)
+        self._db.execute(
+            '''INSERT INTO events (event_key, name, category, description, tags, date_text, start_day, end_day,
+                                   location_text, lat, lon, cell_lat, cell_lon, source_link, location, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (event_key) DO UPDATE SET
+                   name = excluded.name, category = excluded.category, description = excluded.description,
+                   tags = CASE WHEN excluded.tags = '' OR instr(' ' || tags || ' ', ' ' || excluded.tags || ' ') THEN tags
+                               ELSE trim(tags || ' ' || excluded.tags) END,
+                   date_text = excluded.date_text, start_day = excluded.start_day, end_day = excluded.end_day,
+                   location_text = excluded.location_text, lat = excluded.lat, lon = excluded.lon,
+                   cell_lat = excluded.cell_lat, cell_lon = excluded.cell_lon, source_link = excluded.source_link,
+                   location = coalesce(excluded.location, location), updated_at = excluded.updated_at''',
+            (
+                key, str(event.get('event_name') or ''), str(event.get('event_category') or ''), str(event.get('event_description') or ''),
+                interest, str(event.get('event_date') or ''),
+                dates[0].toordinal() if dates else None, dates[1].toordinal() if dates else None,
+                str(event.get('event_location') or ''), lat, lon, cell_lat, cell_lon,
+                str(event.get('event_source_link') or ''), location, now
+            )
+        )
+
+    def _existing_key(self, event, dates, cell_lat, cell_lon):
+        # A near-duplicate already stored in the neighbouring grid cells keeps its key, so it is updated instead of repeated.
+        if cell_lat is None:
+            return None
+        name = canonical_name(event.get('event_name'))
+        rows = self._db.execute(
+            'SELECT event_key, name, start_day, end_day FROM events WHERE cell_lat BETWEEN ? AND ? AND cell_lon BETWEEN ? AND ?',
+            (cell_lat - 1, cell_lat + 1, cell_lon - 1, cell_lon + 1)
+        ).fetchall()
+        span = (dates[0].toordinal(), dates[1].toordinal()) if dates else None
+        for row in rows:
+            stored_span = (row['start_day'], row['end_day']) if row['start_day'] is not None else None
+            if dates_overlap(span, stored_span) and similar_names(name, canonical_name(row['name'])):
+                return row['event_key']
+        return None
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _query(self, interest, location, start, end, limit = 500):
+        clauses, params = [], []
+        if interest:
+            clauses.append('id IN (SELECT rowid FROM events_fts WHERE events_fts MATCH ?)')
+            params.append(fts_query(interest))
+        if start is not None:
+            # Undated events cannot be placed in a window and are left to Gemini.
+            clauses.append('start_day <= ? AND end_day >= ?')
+            params += [end.toordinal(), start.toordinal()]
+        if location:
+            near = self._near(location)
+            if near is None:
+                clauses.append('location = ?')
+                params.append(location)
+            else:
+                # Also events stored under other spellings of the location, through the grid index.
+                (min_lat, max_lat), (min_lon, max_lon) = near
+                clauses.append('(location = ? OR (cell_lat BETWEEN ? AND ? AND cell_lon BETWEEN ? AND ?))')
+                params += [location, min_lat, max_lat, min_lon, max_lon]
+
+        sql = 'SELECT * FROM events' + (' WHERE ' + ' AND '.join(clauses) if clauses else '') + ' ORDER BY start_day, name LIMIT ?'
+        rows = self._db.execute(sql, params + [limit]).fetchall()
+        return [
+            {
+                'event_key': row['event_key'], 'event_category': row['category'], 'event_name': row['name'],
+                'event_source_link': row['source_link'], 'event_date': row['date_text'],
+                'event_location': row['location_text'], 'event_description': row['description'],
+            }
+            for row in rows
+        ]
+
+    def _near(self, location):
+        # Centre of the events stored under this location, and the cell range within radius_km of it.
+        lat, lon = self._db.execute('SELECT AVG(lat), AVG(lon) FROM events WHERE location = ? AND lat IS NOT NULL', (location,)).fetchone()
+        if lat is None:
+            return None
+        lat_span = self.radius_km / 111.0
+        lon_span = self.radius_km / (111.0 * max(0.01, math.cos(math.radians(lat))))
+        low, high = self._cell(lat - lat_span, lon - lon_span), self._cell(lat + lat_span, lon + lon_span)
+        return (low[0], high[0]), (low[1], high[1])
+
+    def _purge(self, now):
+        if now - self._last_purge < 60 * 60:
+            return
+        # Past events and expired coverage, at most once an hour.
+        self._last_purge = now
+        cutoff = datetime.date.today().toordinal() - self.retention_days
+        purged = self._db.execute('DELETE FROM events WHERE end_day < ?', (cutoff,)).rowcount
+        self._db.execute('DELETE FROM coverage WHERE searched_at < ?', (now - self.coverage_ttl,))
+        self.stats['purged'] += purged
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_event_store():
+    '''Returns the process wide event store, shared by every Streamlit session.'''
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EventStore()
+        return _store
@@ -0,0 +1,132 @@
+# Standard Libraries
+import time
+import random
+import logging
+import datetime
+import threading
+from collections import Counter
+
+# Non-Standard Libraries
+import streamlit as st
+
+# Custom Modules
+from config.settings import (PREFETCH_ENABLED, PREFETCH_INTERVAL, PREFETCH_JITTER, PREFETCH_OFF_PEAK_HOURS, PREFETCH_DAILY_BUDGET,
+                             PREFETCH_TOP_COMBOS, PREFETCH_DAYS_AHEAD, PREFETCH_HALF_LIFE)
+from services.search_service import warm_search
+from utils.interests import canonical_interests
+from utils.metrics import metrics
+from utils.rate_limit import model_priority, BACKGROUND
+from utils.query import normalize_text
+
+class QueryStats:
+    '''
+    Popularity of (interest, location) combos in real searches, decayed with a half-life
+    so the prefetch follows what users search now rather than since the process started.
+    '''
+
+    def __init__(self, half_life = PREFETCH_HALF_LIFE):
+        self.half_life = half_life
+        self._counts = Counter() # (interest, folded location) -> decayed count
+        self._locations = {} # folded location -> spelling last searched
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, interests, location):
+        if not normalize_text(location):
+            return
+        with self._lock:
+            self._decay()
+            folded = normalize_text(location)
+            self._locations[folded] = location
+            for interest in canonical_interests(interests):
+                self._counts[(interest, folded)] += 1
+
+    def top(self, n):
+        '''The n most searched (interest, location) combos.'''
+        with self._lock:
+            self._decay()
+            return [(interest, self._locations[folded]) for (interest, folded), _ in self._counts.most_common(n)]
+
+    def _decay(self):
+        now = time.time()
+        factor = 0.5 ** ((now - self._updated) / self.half_life)
+        self._updated = now
+        for combo in list(self._counts):
+            self._counts[combo] *= factor
+            if self._counts[combo] < 0.01:
+                del self._counts[combo]
+
+query_stats = QueryStats()
+
+class PrefetchScheduler:
+    '''
+    Daemon thread that warms the result cache: every interval (plus or minus jitter) during the off-peak hours
+    it searches the upcoming days for the most popular combos, spending at most daily_budget Gemini calls a day.
+    '''
+
+    def __init__(self, stats = query_stats, interval = PREFETCH_INTERVAL, jitter = PREFETCH_JITTER, off_peak_hours = PREFETCH_OFF_PEAK_HOURS,
+                 daily_budget = PREFETCH_DAILY_BUDGET, top_combos = PREFETCH_TOP_COMBOS, days_ahead = PREFETCH_DAYS_AHEAD):
+        self.stats = stats
+        self.interval = interval
+        self.jitter = jitter
+        self.off_peak_hours = off_peak_hours
+        self.daily_budget = daily_budget
+        self.top_combos = top_combos
+        self.days_ahead = days_ahead
+        self._spent = {} # date -> Gemini calls spent on prefetching that day
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target = self._loop, name = 'prefetch-scheduler', daemon = True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def off_peak(self, now = None):
+        start, end = self.off_peak_hours
+        hour = (now or datetime.datetime.now()).hour
+        # The window may wrap around midnight, e.g. (22, 5)
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def budget_left(self, today = None):
+        return max(0, self.daily_budget - self._spent.get(today or datetime.date.today(), 0))
+
+    def run_once(self):
+        '''Prefetches the top combos for the upcoming days within today's budget; returns the Gemini calls made.'''
+        today = datetime.date.today()
+        date_range = (today, today + datetime.timedelta(days = self.days_ahead))
+        calls = 0
+        with metrics.span('prefetch.run'):
+            for interest, location in self.stats.top(self.top_combos):
+                budget = self.budget_left(today)
+                if not budget:
+                    metrics.increment('prefetch.budget_exhausted')
+                    break
+                with model_priority(BACKGROUND):
+                    # Interactive searches are served first whenever both are queued
+                    made = warm_search([interest], location, date_range, limit = budget)
+                self._spent = {today: self._spent.get(today, 0) + made} # Older days are dropped
+                calls += made
+        metrics.increment('prefetch.calls', calls)
+        return calls
+
+    def _loop(self):
+        while not self._stop.wait(max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))):
+            if not self.off_peak():
+                continue
+            try:
+                calls = self.run_once()
+                metrics.log('prefetch.run', calls = calls, budget_left = self.budget_left())
+            except Exception as e:
+                metrics.increment('prefetch.errors')
+                metrics.log('prefetch.failed', logging.ERROR, error = repr(e))
+
+@st.cache_resource
+def get_prefetch_scheduler():
+    '''Starts the process wide prefetch scheduler once (None when PREFETCH_ENABLED is off).'''
+    if not PREFETCH_ENABLED:
+        return None
+    metrics.log('prefetch.started')
+    return PrefetchScheduler().start()
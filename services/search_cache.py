@@ -0,0 +1,139 @@
+# Standard Libraries
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Custom Modules
+from config.settings import SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MEMORY_ENTRIES, SEARCH_CACHE_DISK_ENTRIES
+from utils.query import normalize_text, normalize_date_range
+
+def cache_key(interest, location, date_range):
+    '''Builds the normalized cache key for one (interest, location, date window) search.'''
+    start, end = normalize_date_range(date_range)
+    return json.dumps([normalize_text(interest), normalize_text(location), start.isoformat(), end.isoformat()])
+
+class SearchCache:
+    '''
+    Two tier cache for search results: an in-memory LRU in front of an on-disk SQLite table.
+    Entries expire after their TTL and both tiers are bounded in size.
+    '''
+
+    def __init__(self, path = SEARCH_CACHE_PATH, ttl = SEARCH_CACHE_TTL, memory_entries = SEARCH_CACHE_MEMORY_ENTRIES, disk_entries = SEARCH_CACHE_DISK_ENTRIES):
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict() # key -> (expires_at, events), most recently used last
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        # One connection shared by every Streamlit session thread, access is serialized by the lock.
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            '''CREATE TABLE IF NOT EXISTS search_cache (
+                   key TEXT PRIMARY KEY,
+                   events TEXT NOT NULL,
+                   expires_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )'''
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_last_access ON search_cache (last_access)')
+        self._db.commit()
+
+    def get(self, key):
+        '''Returns a copy of the cached events for the key, or None on a miss.'''
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, events = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return [dict(event) for event in events]
+                del self._memory[key]
+                self.stats['expired'] += 1
+
+            row = self._db.execute('SELECT events, expires_at FROM search_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+
+            events, expires_at = json.loads(row[0]), row[1]
+            if expires_at <= now:
+                self._db.execute('DELETE FROM search_cache WHERE key = ?', (key,))
+                self._db.commit()
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._db.execute('UPDATE search_cache SET last_access = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            # Promote to the memory tier so the next hit skips SQLite.
+            self._remember(key, expires_at, events)
+            self.stats['disk_hits'] += 1
+            return [dict(event) for event in events]
+
+    def set(self, key, events, ttl = None):
+        '''Stores the events under the key in both tiers.'''
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        events = [dict(event) for event in events]
+        with self._lock:
+            self._remember(key, expires_at, events)
+            self._db.execute(
+                'INSERT OR REPLACE INTO search_cache (key, events, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(events), expires_at, now)
+            )
+            self._evict_disk(now)
+            self._db.commit()
+            self.stats['writes'] += 1
+
+    def clear(self):
+        '''Drops every entry from both tiers.'''
+        with self._lock:
+            self._memory.clear()
+            self._db.execute('DELETE FROM search_cache')
+            self._db.commit()
+
+    def snapshot(self):
+        '''Returns the hit/miss counters together with the current tier sizes.'''
+        with self._lock:
+            disk_size = self._db.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+            stats = dict(self.stats, memory_size = len(self._memory), disk_size = disk_size)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, expires_at, events):
+        self._memory[key] = (expires_at, events)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last = False)
+            self.stats['evictions'] += 1
+
+    def _evict_disk(self, now):
+        self._db.execute('DELETE FROM search_cache WHERE expires_at <= ?', (now,))
+        overflow = self._db.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0] - self.disk_entries
+        if overflow > 0:
+            self._db.execute(
+                'DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache ORDER BY last_access ASC LIMIT ?)',
+                (overflow,)
+            )
+            self.stats['evictions'] += overflow
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_search_cache():
+    '''Returns the process wide search cache, shared by every Streamlit session.'''
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
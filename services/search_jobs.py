@@ -0,0 +1,116 @@
+# Standard Libraries
+import time
+import uuid
+import logging
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+# Custom Modules
+from config.settings import SEARCH_STREAMING, SEARCH_JOB_WORKERS
+from services.search_service import search_events, stream_events
+from services.prefetch import query_stats
+from utils.metrics import metrics
+
+# Shared by every session, so script threads hand searches over instead of blocking on Gemini themselves.
+_executor = ThreadPoolExecutor(max_workers = SEARCH_JOB_WORKERS, thread_name_prefix = 'search-job')
+
+class SearchJob:
+    '''
+    Handle of a search running in the background, kept in st.session_state.
+    The results panel polls it for the events found so far, the progress and the final status.
+    '''
+
+    def __init__(self, interests, location, date_range):
+        self.id = uuid.uuid4().hex
+        self.params = (list(interests), location, date_range)
+        self.status = 'queued' # queued -> running -> done | cancelled | failed
+        self.error = None
+        self.progress = (0, 0) # (tasks done, tasks total)
+        self.incomplete = [] # Interests whose search failed or missed the deadline
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self._events = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ('done', 'cancelled', 'failed')
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        '''Asks the job to stop; a queued job never starts, a running one stops at its next event.'''
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self._finish('cancelled')
+
+    def events(self):
+        '''Copy of the events found so far.'''
+        with self._lock:
+            return list(self._events)
+
+    def _add(self, event):
+        with self._lock:
+            if not self._events:
+                metrics.observe('search.time_to_first_event', time.time() - self.submitted_at)
+            self._events.append(event)
+
+    def _set_progress(self, done, total):
+        self.progress = (done, total)
+
+    def _set_incomplete(self, interests):
+        self.incomplete = list(interests)
+
+    def _finish(self, status, error = None):
+        self.error = error
+        self.finished_at = time.time()
+        self.status = status
+
+def _run(job):
+    if job.cancelled:
+        job._finish('cancelled')
+        return
+    job.status = 'running'
+    interests, location, date_range = job.params
+    try:
+        with metrics.span('search.job', streaming = SEARCH_STREAMING):
+            if SEARCH_STREAMING:
+                with closing(stream_events(interests, location, date_range, progress = job._set_progress, incomplete = job._set_incomplete)) as events:
+                    for event in events:
+                        if job.cancelled:
+                            # Closing the stream stops its workers and their model streams.
+                            break
+                        job._add(event)
+            else:
+                # The blocking search cannot be interrupted, a cancelled job just drops its result.
+                for event in search_events(interests, location, date_range, incomplete = job._set_incomplete):
+                    job._add(event)
+    except Exception as e:
+        metrics.increment('search.job_errors')
+        metrics.log('search.job_failed', logging.ERROR, job_id = job.id, error = repr(e))
+        job._finish('failed', error = str(e))
+        return
+
+    if job.cancelled:
+        metrics.increment('search.jobs_cancelled')
+        job._finish('cancelled')
+    else:
+        job._finish('done')
+
+def submit_search(interests, location, date_range, previous = None):
+    '''
+    Starts a search in the background and returns its SearchJob right away.
+    The session's previous job, if still running, is cancelled since its results are outdated.
+    '''
+    if previous is not None and not previous.done:
+        previous.cancel()
+    # Real searches drive what the prefetch scheduler keeps warm.
+    query_stats.record(interests, location)
+    job = SearchJob(interests, location, date_range)
+    job.future = _executor.submit(_run, job)
+    return job
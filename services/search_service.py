@@ -0,0 +1,225 @@
+# Custom Modules
+from config.settings import SEARCH_FAN_OUT, EVENT_STORE_ENABLED, SEARCH_DEADLINE
+from concierge.agent import invoke, search_parallel, search_interest, build_prompt, invoke_stream, stream_parallel, stream_interest
+from concierge.parsing import parse_events, iter_events
+from services.search_cache import get_search_cache, cache_key
+from services.event_store import get_event_store
+from services.single_flight import SingleFlight, Abandoned
+from utils.dedup import EventDeduplicator
+from utils.interests import canonical_interests
+from utils.metrics import metrics
+from utils.query import normalize_date_range, split_date_range, event_in_range
+
+# Identical searches in flight at the same time (any session) share one Gemini call.
+search_flights = SingleFlight()
+
+def coalescing_stats():
+    '''Returns how many searches led a Gemini call and how many were coalesced onto one.'''
+    return search_flights.snapshot()
+
+def plan_search(interests, location, date_range):
+    '''
+    Splits a search into (subject, location, window) tasks, each searched and cached on its own.
+    The subject is a single interest with SEARCH_FAN_OUT, otherwise the tuple of every interest.
+    Interests are canonicalized first, so spelling variants and aliases of one interest share a task.
+    '''
+    interests = canonical_interests(interests)
+    windows = split_date_range(date_range)
+    if SEARCH_FAN_OUT:
+        return [(interest, location, window) for interest in interests for window in windows]
+    return [(tuple(interests), location, window) for window in windows]
+
+def task_key(subject, location, window):
+    '''Cache and single-flight key of a search task.'''
+    label = subject if isinstance(subject, str) else '|'.join(sorted(subject))
+    return cache_key(label, location, window)
+
+def _search_task(subject, location, window):
+    if isinstance(subject, str):
+        return search_interest(subject, location, window)
+    # The combined call answers every interest at once.
+    text = invoke(build_prompt(list(subject), location, window))
+    with metrics.span('parse.events'):
+        return parse_events(text)
+
+def _stream_task(subject, location, window):
+    if isinstance(subject, str):
+        return stream_interest(subject, location, window)
+    return iter_events(invoke_stream(build_prompt(list(subject), location, window)))
+
+def _lookup(task):
+    '''
+    Events of a task without asking Gemini: from the result cache, else from the local event store
+    when it has recently searched every interest of the task. None when neither can answer.
+    '''
+    key = task_key(*task)
+    events = get_search_cache().get(key)
+    if events is None and EVENT_STORE_ENABLED:
+        events = get_event_store().answer(*task)
+        if events is not None:
+            metrics.increment('event_store.answered')
+            get_search_cache().set(key, events)
+    return events
+
+def _remember(task, events):
+    # Only completed searches get here: failed ones, and answers without a parseable event (UnparseableAnswer),
+    # raise first and are therefore never cached or marked as covered.
+    get_search_cache().set(task_key(*task), events)
+    if EVENT_STORE_ENABLED:
+        subject, location, window = task
+        for interest in ([subject] if isinstance(subject, str) else subject):
+            get_event_store().add(events, interest, location, window)
+
+def _fetch(key, task):
+    # Runs as the single-flight leader: re-check the cache, another leader may have just filled it.
+    events = _lookup(task)
+    if events is None:
+        events = _search_task(*task)
+        _remember(task, events)
+    return events
+
+def _copies(events):
+    # Coalesced callers share the leader's list, give each its own dictionaries.
+    return [dict(event) for event in events]
+
+def _search_shared(*task):
+    key = task_key(*task)
+    return _copies(search_flights.do(key, _fetch, key, task))
+
+def _stream_shared(*task):
+    # Streaming counterpart of search_flights.do: the leader streams and publishes the full list at the end,
+    # followers wait for it and then replay it.
+    key = task_key(*task)
+    future, leader = search_flights.begin(key)
+    if not leader:
+        try:
+            events = future.result()
+        except Abandoned:
+            # The leader's consumer went away (a cancelled search, or one past its deadline): stream on our own.
+            metrics.increment('search.leader_abandoned')
+            yield from _stream_task(*task)
+            return
+        yield from _copies(events)
+        return
+
+    events = []
+    try:
+        for event in _stream_task(*task):
+            events.append(event)
+            yield event
+    except GeneratorExit:
+        # The consumer abandoned the stream, followers must not wait forever.
+        search_flights.finish(key, future, error = Abandoned())
+        raise
+    except BaseException as e:
+        search_flights.finish(key, future, error = e)
+        raise
+    search_flights.finish(key, future, result = events)
+
+def missing_interests(tasks):
+    '''The interests of the given (unfinished) tasks, in first seen order.'''
+    interests = []
+    for subject, _location, _window in tasks:
+        for interest in ([subject] if isinstance(subject, str) else subject):
+            if interest not in interests:
+                interests.append(interest)
+    return interests
+
+class _RangeFilter:
+    '''
+    Keeps the events that overlap the searched range (windows can reach past its ends)
+    and merges near-duplicates: multi-day events found in several windows, or one event found by overlapping interests.
+    '''
+
+    def __init__(self, date_range):
+        self.start, self.end = normalize_date_range(date_range)
+        self._deduplicator = EventDeduplicator()
+
+    def keep(self, event):
+        if not event_in_range(event, self.start, self.end):
+            return False
+        if not self._deduplicator.add(event):
+            metrics.increment('dedup.merged')
+            return False
+        return True
+
+def search_events(interests, location, date_range, incomplete = None, deadline = SEARCH_DEADLINE):
+    '''
+    Entry point used by the UI: answers a search from the per-window result cache or the local event store
+    where possible and only calls Gemini, concurrently, for the (interest, window) pairs neither can answer.
+    Returns what has arrived after deadline seconds; incomplete, if given, is called with the interests
+    whose search failed or had not finished by then.
+    '''
+    tasks = plan_search(interests, location, date_range)
+
+    results = {}
+    missing = []
+    for task in tasks:
+        events = _lookup(task)
+        if events is None:
+            missing.append(task)
+        else:
+            results[task] = events
+
+    if missing:
+        metrics.log('search.cache_miss', missing = len(missing), tasks = len(tasks))
+        for task, events in zip(missing, search_parallel(missing, _search_shared, timeout = deadline)):
+            if events is not None:
+                results[task] = events
+        unfinished = [task for task in missing if task not in results]
+        if unfinished and incomplete:
+            incomplete(missing_interests(unfinished))
+
+    events_filter = _RangeFilter(date_range)
+    return [event for task in tasks for event in results.get(task, []) if events_filter.keep(event)]
+
+def stream_events(interests, location, date_range, progress = None, incomplete = None, deadline = SEARCH_DEADLINE):
+    '''
+    Streaming variant of search_events: yields cached events first, then every freshly
+    found event as soon as the model has written it. Completed tasks are cached.
+    progress, if given, is called as progress(done, total) whenever a (interest, window) task completes.
+    The stream ends after deadline seconds at the latest; incomplete is called as in search_events.
+    '''
+    tasks = plan_search(interests, location, date_range)
+    events_filter = _RangeFilter(date_range)
+
+    missing = []
+    for task in tasks:
+        events = _lookup(task)
+        if events is None:
+            missing.append(task)
+        else:
+            yield from (event for event in events if events_filter.keep(event))
+
+    done = len(tasks) - len(missing)
+    if progress:
+        progress(done, len(tasks))
+
+    found = {task: [] for task in missing}
+    finished = set()
+    for task, event in stream_parallel(missing, stream = _stream_shared, timeout = deadline):
+        if event is None:
+            # The task streamed to completion (iter_events raises for an answer without events), it is safe to cache.
+            _remember(task, found[task])
+            finished.add(task)
+            done += 1
+            if progress:
+                progress(done, len(tasks))
+        else:
+            found[task].append(event)
+            if events_filter.keep(event):
+                yield event
+
+    unfinished = [task for task in missing if task not in finished]
+    if unfinished and incomplete:
+        incomplete(missing_interests(unfinished))
+
+def warm_search(interests, location, date_range, limit):
+    '''
+    Background prefetch: runs at most limit of the search's uncached tasks so later searches are served warm.
+    Returns the number of tasks sent to Gemini.
+    '''
+    missing = [task for task in plan_search(interests, location, date_range) if _lookup(task) is None][:limit]
+    if missing:
+        search_parallel(missing, _search_shared)
+    return len(missing)
@@ -0,0 +1,217 @@
+# Standard Libraries
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Non-Standard Libraries
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+# Custom Modules
+from config.settings import ADK_SESSION_BACKEND, ADK_SESSION_DB_PATH, ADK_SESSION_MAX_IN_MEMORY, ADK_SESSION_IDLE_TIMEOUT, ADK_SESSION_MAX_EVENTS, ADK_SESSION_RETENTION
+
+def is_turn_start(event):
+    '''True for the user message that starts a turn (not a function response the user sends back).'''
+    return event.author == 'user' and not event.get_function_responses()
+
+class BoundedSessionService(BaseSessionService):
+    '''
+    ADK session service with bounded memory use.
+    Sessions are written through to SQLite (WAL) and only the recently used ones are kept in memory:
+    the least recently used are evicted past max_in_memory, idle ones after idle_timeout.
+    Evicted sessions are reloaded from disk on their next access, and every session keeps about max_events events
+    (whole turns are dropped from the front).
+    '''
+
+    def __init__(self, path = ADK_SESSION_DB_PATH, max_in_memory = ADK_SESSION_MAX_IN_MEMORY, idle_timeout = ADK_SESSION_IDLE_TIMEOUT, max_events = ADK_SESSION_MAX_EVENTS, retention = ADK_SESSION_RETENTION):
+        self.max_in_memory = max_in_memory
+        self.idle_timeout = idle_timeout
+        self.max_events = max_events
+        self.retention = retention
+        self._sessions = OrderedDict() # (app_name, user_id, session_id) -> [last_access, session, size_in_bytes]
+        self._lock = threading.RLock()
+        self._last_purge = 0.0
+        self.stats = {'created': 0, 'loaded_from_disk': 0, 'lru_evictions': 0, 'idle_evictions': 0, 'events_trimmed': 0, 'purged_from_disk': 0}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL') # Safe with WAL and much cheaper per append
+        self._db.execute(
+            '''CREATE TABLE IF NOT EXISTS adk_sessions (
+                   app_name TEXT NOT NULL,
+                   user_id TEXT NOT NULL,
+                   session_id TEXT NOT NULL,
+                   data TEXT NOT NULL,
+                   last_update_time REAL NOT NULL,
+                   PRIMARY KEY (app_name, user_id, session_id)
+               )'''
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_adk_sessions_last_update ON adk_sessions (last_update_time)')
+        self._db.commit()
+
+    async def create_session(self, *, app_name, user_id, state = None, session_id = None):
+        session = Session(
+            id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4()),
+            app_name = app_name,
+            user_id = user_id,
+            state = dict(state or {}),
+            last_update_time = time.time()
+        )
+        await asyncio.to_thread(self._store, session)
+        self.stats['created'] += 1
+        return session.model_copy(deep = True)
+
+    async def get_session(self, *, app_name, user_id, session_id, config: GetSessionConfig = None):
+        session = await asyncio.to_thread(self._load, (app_name, user_id, session_id))
+        if session is None:
+            return None
+
+        session = session.model_copy(deep = True)
+        if config and config.num_recent_events:
+            session.events = session.events[-config.num_recent_events:]
+        if config and config.after_timestamp:
+            session.events = [event for event in session.events if event.timestamp >= config.after_timestamp]
+        return session
+
+    async def list_sessions(self, *, app_name, user_id):
+        def list_ids():
+            with self._lock:
+                return self._db.execute(
+                    'SELECT session_id, last_update_time FROM adk_sessions WHERE app_name = ? AND user_id = ?',
+                    (app_name, user_id)
+                ).fetchall()
+
+        rows = await asyncio.to_thread(list_ids)
+        return ListSessionsResponse(sessions = [
+            Session(id = session_id, app_name = app_name, user_id = user_id, last_update_time = last_update_time)
+            for session_id, last_update_time in rows
+        ])
+
+    async def delete_session(self, *, app_name, user_id, session_id):
+        def delete():
+            with self._lock:
+                self._sessions.pop((app_name, user_id, session_id), None)
+                self._db.execute(
+                    'DELETE FROM adk_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?',
+                    (app_name, user_id, session_id)
+                )
+                self._db.commit()
+
+        await asyncio.to_thread(delete)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        if event.partial:
+            return event
+        session.last_update_time = event.timestamp
+
+        # Apply the same event to the stored copy; the caller's copy may have been fetched with a filtered history.
+        await asyncio.to_thread(self._apply_event, session, event)
+        return event
+
+    def snapshot(self):
+        '''Returns memory and eviction metrics for the metrics page.'''
+        with self._lock:
+            in_memory = len(self._sessions)
+            memory_bytes = sum(entry[2] for entry in self._sessions.values())
+            on_disk = self._db.execute('SELECT COUNT(*) FROM adk_sessions').fetchone()[0]
+        return dict(self.stats, sessions_in_memory = in_memory, approx_memory_bytes = memory_bytes, sessions_on_disk = on_disk)
+
+    def _apply_event(self, session, event):
+        # Load, update and store under one lock: ParallelAgent branches append to the same session concurrently.
+        with self._lock:
+            stored = self._load((session.app_name, session.user_id, session.id))
+            if stored is None:
+                stored = session.model_copy(deep = True)
+            else:
+                stored = stored.model_copy(deep = True)
+                if event.actions and event.actions.state_delta:
+                    stored.state.update({key: value for key, value in event.actions.state_delta.items() if not key.startswith(State.TEMP_PREFIX)})
+                stored.events.append(event)
+                stored.last_update_time = event.timestamp
+                self._trim(stored)
+            self._store(stored)
+
+    def _trim(self, session):
+        # Whole turns are dropped (a turn starts at a user message), never part of one: a function call cut off from its
+        # function response would leave an invalid history. The current turn alone may go past max_events.
+        overflow = len(session.events) - self.max_events
+        if overflow <= 0:
+            return
+        starts = [index for index, event in enumerate(session.events) if index and is_turn_start(event)]
+        cut = next((index for index in starts if index >= overflow), starts[-1] if starts else 0)
+        if cut:
+            del session.events[:cut]
+            self.stats['events_trimmed'] += cut
+
+    def _store(self, session):
+        data = session.model_dump_json()
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO adk_sessions (app_name, user_id, session_id, data, last_update_time) VALUES (?, ?, ?, ?, ?)',
+                (*key, data, session.last_update_time)
+            )
+            self._db.commit()
+            self._remember(key, session, len(data))
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                entry[0] = time.time()
+                self._sessions.move_to_end(key)
+                self._evict()
+                return entry[1]
+
+            row = self._db.execute(
+                'SELECT data FROM adk_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?', key
+            ).fetchone()
+            if row is None:
+                return None
+            session = Session.model_validate_json(row[0])
+            self.stats['loaded_from_disk'] += 1
+            self._remember(key, session, len(row[0]))
+            return session
+
+    def _remember(self, key, session, size):
+        # Called with the lock held.
+        self._sessions[key] = [time.time(), session, size]
+        self._sessions.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        # Called with the lock held. Entries are ordered by last access, so idle ones are at the front.
+        now = time.time()
+        while self._sessions:
+            key, (last_access, _, _) = next(iter(self._sessions.items()))
+            if now - last_access > self.idle_timeout:
+                self._sessions.popitem(last = False)
+                self.stats['idle_evictions'] += 1
+            elif len(self._sessions) > self.max_in_memory:
+                self._sessions.popitem(last = False)
+                self.stats['lru_evictions'] += 1
+            else:
+                break
+
+        if now - self._last_purge > 60 * 60:
+            # Forget sessions nobody has touched for the retention period, at most once an hour.
+            self._last_purge = now
+            purged = self._db.execute('DELETE FROM adk_sessions WHERE last_update_time < ?', (now - self.retention,)).rowcount
+            self._db.commit()
+            self.stats['purged_from_disk'] += purged
+
+def create_session_service(backend = ADK_SESSION_BACKEND):
+    '''Creates the ADK session service configured by ADK_SESSION_BACKEND ("sqlite" or "memory").'''
+    if backend == 'memory':
+        return InMemorySessionService()
+    if backend == 'sqlite':
+        return BoundedSessionService()
+    raise ValueError(f"Unknown ADK session backend: {backend}")
@@ -0,0 +1,64 @@
+# Standard Libraries
+import threading
+from concurrent.futures import Future
+
+class Abandoned(Exception):
+    '''Published to the followers when the leader stopped without a result (e.g. its stream was closed early).'''
+
+class SingleFlight:
+    '''
+    Process wide request coalescing: while a call for a key is in flight, identical calls from other
+    sessions wait for the leader's result instead of issuing their own Gemini request.
+    '''
+
+    def __init__(self):
+        self._calls = {} # key -> Future of the in-flight leader
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'coalesced': 0}
+
+    def begin(self, key):
+        '''
+        Joins the in-flight call for the key, or becomes its leader.
+        Returns (future, is_leader); the leader must call finish() once it has a result or an error.
+        '''
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.stats['leaders'] += 1
+            return future, True
+
+    def finish(self, key, future, result = None, error = None):
+        '''Publishes the leader's result (or error) to every follower and closes the flight.'''
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        '''Runs fn once per key at a time; concurrent callers with the same key share its result.'''
+        future, leader = self.begin(key)
+        if not leader:
+            try:
+                return future.result()
+            except Abandoned:
+                # Nothing to share, do the work without the leader.
+                return fn(*args, **kwargs)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, future, error = e)
+            raise
+        self.finish(key, future, result = result)
+        return result
+
+    def snapshot(self):
+        '''Returns the leader / coalesced counters and the number of calls currently in flight.'''
+        with self._lock:
+            return dict(self.stats, in_flight = len(self._calls))
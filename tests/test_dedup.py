@@ -0,0 +1,57 @@
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from utils.dedup import canonical_name, canonical_key, similar_names, dates_overlap, EventDeduplicator
+
+def event(name, date = '2025.10.23', location = '43.7696, 11.2558'):
+    return {'event_name': name, 'event_date': date, 'event_location': location, 'event_category': 'Jazz',
+            'event_description': '', 'event_source_link': ''}
+
+def test_canonical_name():
+    assert canonical_name('  Café Jazz: Night #2 ') == 'cafe jazz night 2'
+
+def test_canonical_key_ignores_the_date_format():
+    assert canonical_key(event('Jazz Night', '2025.10.23')) == canonical_key(event('jazz night', '2025-10-23'))
+
+@pytest.mark.parametrize('first, second', [
+    ('firenze jazz festival', 'firenze jazz festival'),
+    ('firenze jazz festival', 'firenze jazz festival piazzale michelangelo'),
+    ('firenze jazz festival piazzale michelangelo', 'firenze jazz festival'),
+    ('uffizi after hours', 'uffizi afterhours'),
+])
+def test_similar(first, second):
+    assert similar_names(first, second)
+
+@pytest.mark.parametrize('first, second', [
+    ('jazz night 1', 'jazz night 2'),
+    # A bare name is not one of its numbered editions, in either order.
+    ('jazz night', 'jazz night 1'),
+    ('jazz night 1', 'jazz night'),
+    ('jazz festival', 'night 2 jazz festival'),
+    ('night 2 jazz festival', 'jazz festival'),
+    ('jazz night 1', 'jazz night 1 2'),
+    ('opera', 'opera gala'),
+    ('firenze jazz festival', 'roma jazz festival'),
+])
+def test_not_similar(first, second):
+    assert not similar_names(first, second)
+
+def test_dates_overlap():
+    assert dates_overlap((1, 3), (3, 5))
+    assert not dates_overlap((1, 2), (3, 5))
+    assert dates_overlap(None, (3, 5))
+
+def test_deduplicator_merges_near_duplicates():
+    deduplicator = EventDeduplicator()
+    events = [
+        event('Firenze Jazz Festival', '2025.10.23 - 2025.10.26'),
+        event('Firenze Jazz Festival: Piazzale Michelangelo', '2025.10.24', '43.7629, 11.2650'),
+        event('Jazz Night 1'),
+        event('Jazz Night'),
+        event('Firenze Jazz Festival', '2025.11.20'), # Another edition, a month later
+        event('Firenze Jazz Festival', location = '45.4642, 9.1900'), # Milano
+    ]
+    kept = [item['event_name'] for item in events if deduplicator.add(item)]
+    assert kept == ['Firenze Jazz Festival', 'Jazz Night 1', 'Jazz Night', 'Firenze Jazz Festival', 'Firenze Jazz Festival']
+    assert deduplicator.merged == 1
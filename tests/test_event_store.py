@@ -0,0 +1,68 @@
+# Standard Libraries
+import datetime
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from services.event_store import EventStore, fts_query
+
+DAY = datetime.date.today() + datetime.timedelta(days = 10)
+WINDOW = (DAY, DAY + datetime.timedelta(days = 6))
+
+def event(name, day = DAY, location = '43.7696, 11.2558', category = 'Jazz', description = 'Live music.'):
+    return {'event_category': category, 'event_name': name, 'event_source_link': 'https://example.com',
+            'event_date': day.strftime('%Y.%m.%d'), 'event_location': location, 'event_description': description}
+
+@pytest.fixture
+def store():
+    return EventStore(path = ':memory:')
+
+def test_fts_query():
+    assert fts_query("Farmer's Market") == '"farmer" "s" "market"'
+
+def test_uncovered_search_is_left_to_the_model(store):
+    store.add([event('Jazz Night')])
+    assert store.answer('Jazz', 'Florence', WINDOW) is None
+    assert store.stats['uncovered'] == 1
+
+def test_covered_search_is_answered_from_the_store(store):
+    store.add([event('Jazz Night')], 'Jazz', 'Florence', WINDOW)
+    store.add([event('Opera Gala', category = 'Opera', description = 'Verdi.')], 'Opera', 'Florence', WINDOW)
+    assert store.answer('jazz', ' florence ', WINDOW) == [event('Jazz Night')]
+    assert store.stats['answered'] == 1
+
+def test_events_match_the_interest_they_were_found_for(store):
+    store.add([event('Blue Note Evening', category = 'Music', description = 'Saxophone quartet.')], 'Jazz', 'Florence', WINDOW)
+    assert [found['event_name'] for found in store.answer('Jazz', 'Florence', WINDOW)] == ['Blue Note Evening']
+
+def test_enclosing_window_covers_its_days(store):
+    store.add([event('Jazz Night')], 'Jazz', 'Florence', WINDOW)
+    assert store.answer('Jazz', 'Florence', DAY) == [event('Jazz Night')]
+    outside = DAY + datetime.timedelta(days = 30)
+    assert store.answer('Jazz', 'Florence', outside) is None
+
+def test_every_interest_must_be_covered(store):
+    store.add([event('Jazz Night')], 'Jazz', 'Florence', WINDOW)
+    assert store.answer(('Jazz', 'Art'), 'Florence', WINDOW) is None
+    store.add([event('Uffizi After Hours', category = 'Art', description = 'Late opening.')], 'Art', 'Florence', WINDOW)
+    names = [found['event_name'] for found in store.answer(('Jazz', 'Art'), 'Florence', WINDOW)]
+    assert names == ['Jazz Night', 'Uffizi After Hours']
+
+def test_events_outside_the_window_are_filtered(store):
+    later = DAY + datetime.timedelta(days = 20)
+    store.add([event('Jazz Night'), event('Late Jazz', later)], 'Jazz', 'Florence', (DAY, later))
+    assert store.answer('Jazz', 'Florence', WINDOW) == [event('Jazz Night')]
+
+def test_near_duplicates_update_the_stored_event(store):
+    store.add([event('Firenze Jazz Festival')], 'Jazz', 'Florence', WINDOW)
+    store.add([event('Firenze Jazz Festival Piazzale Michelangelo', location = '43.7701, 11.2560')], 'Jazz', 'Florence', WINDOW)
+    assert store.snapshot()['events'] == 1
+    assert store.answer('Jazz', 'Florence', WINDOW)[0]['event_name'] == 'Firenze Jazz Festival Piazzale Michelangelo'
+
+def test_snapshot(store):
+    store.add([event('Jazz Night'), event('Opera Gala')], 'Jazz', 'Florence', WINDOW)
+    snapshot = store.snapshot()
+    assert snapshot['events'] == 2
+    assert snapshot['covered_searches'] == 1
+    assert snapshot['upserts'] == 2
@@ -0,0 +1,73 @@
+# Standard Libraries
+import time
+import itertools
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+import utils.hedge as hedge
+from utils.metrics import Metrics
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics(window = 100)
+    monkeypatch.setattr(hedge, 'metrics', metrics)
+    monkeypatch.setattr(hedge, 'HEDGE_ENABLED', True)
+    monkeypatch.setattr(hedge, 'HEDGE_PERCENTILE', 0.95)
+    monkeypatch.setattr(hedge, 'HEDGE_MIN_SAMPLES', 20)
+    monkeypatch.setattr(hedge, 'HEDGE_MIN_DELAY', 0.0)
+    return metrics
+
+def observe(metrics, durations):
+    for seconds in durations:
+        metrics.observe('gemini.generate', seconds)
+
+def test_no_delay_before_min_samples(metrics):
+    observe(metrics, [0.05] * 19)
+    assert hedge.hedge_delay('gemini.generate') is None
+
+def test_delay_is_the_p95_not_the_slowest_call(metrics):
+    # 19 typical calls and one outlier: the p95 of 20 samples is the 19th, not the outlier.
+    observe(metrics, [0.05] * 19 + [2.0])
+    assert hedge.hedge_delay('gemini.generate') == 0.05
+
+def test_delay_has_a_floor(metrics, monkeypatch):
+    monkeypatch.setattr(hedge, 'HEDGE_MIN_DELAY', 0.5)
+    observe(metrics, [0.05] * 20)
+    assert hedge.hedge_delay('gemini.generate') == 0.5
+
+def test_call_slower_than_the_p95_is_hedged(metrics):
+    observe(metrics, [0.05] * 19 + [2.0])
+    attempts = itertools.count()
+
+    def call():
+        # The first attempt is stuck in the tail, the duplicate answers at the usual speed.
+        if next(attempts) == 0:
+            time.sleep(1.0)
+            return 'slow'
+        return 'fast'
+
+    start = time.perf_counter()
+    assert hedge.hedged_call(call, hedge.hedge_delay('gemini.generate')) == 'fast'
+    assert time.perf_counter() - start < 0.5
+    counters = metrics.snapshot()['counters']
+    assert counters['hedge.sent'] == 1
+    assert counters['hedge.won'] == 1
+
+def test_fast_call_is_not_hedged(metrics):
+    observe(metrics, [0.05] * 19 + [2.0])
+    assert hedge.hedged_call(lambda: 'answer', hedge.hedge_delay('gemini.generate')) == 'answer'
+    assert 'hedge.sent' not in metrics.snapshot()['counters']
+
+def test_stream_slower_than_the_p95_is_hedged(metrics):
+    observe(metrics, [0.05] * 19 + [2.0])
+    attempts = itertools.count()
+
+    def stream():
+        if next(attempts) == 0:
+            time.sleep(1.0)
+        yield from ['a', 'b']
+
+    assert list(hedge.hedged_stream(stream, hedge.hedge_delay('gemini.generate'))) == ['a', 'b']
+    assert metrics.snapshot()['counters']['hedge.won'] == 1
@@ -0,0 +1,37 @@
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from utils.interests import canonical_interest, canonical_interests
+
+@pytest.mark.parametrize('interest, canonical', [
+    ('jazz', 'Jazz'),
+    ('  JAZZ  ', 'Jazz'),
+    ('jazz music', 'Jazz'),
+    ('Farmers Market', "Farmer's Market"),
+    ('Theatr', 'Theatre'),
+    ('Hikking', 'Hiking'),
+])
+def test_known_interests(interest, canonical):
+    assert canonical_interest(interest, fuzzy = True) == canonical
+
+@pytest.mark.parametrize('interest', ['Part', 'Arts and Crafts', 'Rock'])
+def test_unknown_interests_keep_their_spelling(interest):
+    assert canonical_interest(interest, fuzzy = True) == interest
+
+def test_fuzzy_matching_can_be_disabled():
+    assert canonical_interest('Theatr', fuzzy = False) == 'Theatr'
+
+def test_whitespace_is_collapsed():
+    assert canonical_interest('  Street   Food ') == 'Street Food'
+
+@pytest.mark.parametrize('interest', ['', '   ', None])
+def test_blank_interest(interest):
+    assert canonical_interest(interest) is None
+
+def test_canonical_interests_drop_blanks_and_duplicates_in_order():
+    interests = ['live jazz', 'Art', '', 'JAZZ', 'museums', 'street food', 'Street  Food']
+    assert canonical_interests(interests, fuzzy = True) == ['Jazz', 'Art', 'street food']
+
+def test_canonical_interests_of_nothing():
+    assert canonical_interests(None) == []
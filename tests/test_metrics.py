@@ -0,0 +1,36 @@
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from utils.metrics import Metrics, _percentile
+
+@pytest.mark.parametrize('samples, fraction, expected', [
+    (range(1, 11), 0.50, 5),
+    (range(1, 11), 0.95, 10),
+    (range(1, 101), 0.50, 50),
+    (range(1, 101), 0.95, 95),
+    (range(1, 101), 0.99, 99),
+    (range(1, 21), 0.95, 19),
+    (range(1, 21), 1.00, 20),
+    (range(1, 21), 0.00, 1),
+    ([7], 0.95, 7),
+])
+def test_nearest_rank_percentile(samples, fraction, expected):
+    assert _percentile(list(samples), fraction) == expected
+
+def test_percentile_needs_min_samples():
+    metrics = Metrics(window = 100)
+    for value in range(1, 20):
+        metrics.observe('stage', value)
+    assert metrics.percentile('stage', 0.95, min_samples = 20) is None
+
+    metrics.observe('stage', 20)
+    assert metrics.percentile('stage', 0.95, min_samples = 20) == 19
+
+def test_snapshot_percentiles():
+    metrics = Metrics(window = 100)
+    for value in range(1, 101):
+        metrics.observe('stage', value)
+    stage = metrics.snapshot()['stages']['stage']
+    assert (stage['p50'], stage['p95'], stage['p99'], stage['max']) == (50, 95, 99, 100)
+    assert stage['count'] == 100
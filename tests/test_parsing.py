@@ -0,0 +1,112 @@
+# Standard Libraries
+import json
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from concierge.parsing import UnparseableAnswer, strip_code_fences, parse_events, load_event, validate_event, EventStreamParser, iter_events
+
+def event(name = 'Jazz Night', **fields):
+    return {'event_category': 'Jazz', 'event_name': name, 'event_source_link': 'https://example.com',
+            'event_date': '2025.10.23', 'event_location': '43.77, 11.26', 'event_description': 'Live jazz.', **fields}
+
+def test_strip_code_fences():
+    assert strip_code_fences('```json\n[]\n```') == '[]'
+    assert strip_code_fences('  []  ') == '[]'
+
+@pytest.mark.parametrize('text', ['', '[]', '```json\n[]\n```'])
+def test_empty_answer(text):
+    assert parse_events(text) == []
+
+def test_valid_answer():
+    events = [event('Jazz Night'), event('Opera Gala')]
+    assert parse_events(json.dumps(events)) == events
+
+def test_fenced_answer():
+    assert parse_events(f'```json\n{json.dumps([event()])}\n```') == [event()]
+
+def test_extra_fields_are_dropped():
+    assert parse_events(json.dumps([event(rating = 5)])) == [event()]
+
+def test_salvages_around_prose():
+    text = f'Here are the events I found:\n{json.dumps([event()])}\nEnjoy your stay!'
+    assert parse_events(text) == [event()]
+
+def test_salvages_a_truncated_array():
+    text = json.dumps([event('Jazz Night'), event('Opera Gala')])[:-40]
+    assert parse_events(text) == [event('Jazz Night')]
+
+def test_salvages_around_a_bad_element():
+    incomplete = {key: value for key, value in event('Broken').items() if key != 'event_date'}
+    text = json.dumps([event('Jazz Night'), incomplete, event('Opera Gala')])
+    assert parse_events(text) == [event('Jazz Night'), event('Opera Gala')]
+
+def test_salvages_a_trailing_comma():
+    text = '[' + json.dumps(event())[:-1] + ',}]'
+    assert parse_events(text) == [event()]
+
+@pytest.mark.parametrize('text', [
+    'I could not find any events for these interests.',
+    '[{"event_name": "Jazz Night"}]',
+    '[{"event_name": ',
+])
+def test_unparseable_answer(text):
+    with pytest.raises(UnparseableAnswer):
+        parse_events(text)
+
+def test_unparseable_answer_is_a_value_error():
+    assert issubclass(UnparseableAnswer, ValueError)
+
+def test_load_event():
+    assert load_event('{"a": 1,}') == {'a': 1}
+    assert load_event('{"a": ') is None
+
+def test_validate_event():
+    assert validate_event(event()) == event()
+    assert validate_event({'event_name': 'Jazz Night'}) is None
+    assert validate_event(None) is None
+
+def chunked(text, size):
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+@pytest.mark.parametrize('size', [1, 7, 1000])
+def test_stream_parser_yields_events_as_they_complete(size):
+    events = [event('Jazz Night'), event('Opera {Gala}', event_description = 'Quotes \\" and } braces.')]
+    parser = EventStreamParser()
+    found = [parser.feed(chunk) for chunk in chunked(json.dumps(events), size)]
+    assert [item for batch in found for item in batch] == events
+    assert parser.found == 2
+    parser.close()
+
+def test_stream_parser_returns_the_first_event_before_the_array_ends():
+    text = json.dumps([event('Jazz Night'), event('Opera Gala')])
+    parser = EventStreamParser()
+    first = text.index('}') + 1
+    assert parser.feed(text[:first]) == [event('Jazz Night')]
+    assert parser.feed(text[first:]) == [event('Opera Gala')]
+
+def test_stream_parser_counts_rejected_objects():
+    text = json.dumps([{'event_name': 'Broken'}, event()])
+    parser = EventStreamParser()
+    assert parser.feed('```json\n' + text + '\n```') == [event()]
+    assert parser.rejected == 1
+
+@pytest.mark.parametrize('text', ['', '[]', '```json\n[ ]\n```'])
+def test_stream_parser_close_accepts_an_empty_answer(text):
+    parser = EventStreamParser()
+    parser.feed(text)
+    parser.close()
+
+@pytest.mark.parametrize('text', ['No events found.', '[{"event_name": "Broken"}]'])
+def test_stream_parser_close_rejects_an_answer_without_events(text):
+    parser = EventStreamParser()
+    assert parser.feed(text) == []
+    with pytest.raises(UnparseableAnswer):
+        parser.close()
+
+def test_iter_events():
+    events = [event('Jazz Night'), event('Opera Gala')]
+    assert list(iter_events(chunked(json.dumps(events), 5))) == events
+    with pytest.raises(UnparseableAnswer):
+        list(iter_events(['Sorry, ', 'no events.']))
@@ -0,0 +1,205 @@
+# Standard Libraries
+import types
+import threading
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+import concierge.prompt_cache as prompt_cache_module
+from concierge.prompt_cache import PromptCache, DISPLAY_NAME_PREFIX, cache_key, min_cache_tokens
+from concierge.agent import CONCIERGE_INSTRUCTION
+from benchmarks.fake_client import FakeGeminiClient, estimate_tokens
+
+MODEL = 'gemini-2.5-flash'
+INSTRUCTION = 'Find local events. ' * 20
+
+class Clock:
+    '''Stand-in for time.monotonic that only moves when told to.'''
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prompt_cache_module, 'time', types.SimpleNamespace(monotonic = clock.monotonic))
+    return clock
+
+@pytest.fixture
+def client():
+    return FakeGeminiClient(min_cache_tokens = 10)
+
+def make_cache(**kwargs):
+    return PromptCache(**{'enabled': True, 'ttl': 3600, 'renew_before': 300, 'retry_after': 600, 'min_tokens': {'': 10}, **kwargs})
+
+def settle(cache, client, model = MODEL, instruction = INSTRUCTION):
+    '''get() and wait for the create or renew it started in the background.'''
+    cache.get(client, model, instruction)
+    assert cache.wait(5)
+    return cache.get(client, model, instruction)
+
+def stored(client):
+    return [cached.name for cached in client.caches.list()]
+
+def test_created_lazily_in_the_background(clock, client):
+    cache = make_cache()
+    assert stored(client) == []
+
+    # The first request does not wait for the cache, it goes uncached.
+    assert cache.get(client, MODEL, INSTRUCTION) is None
+    assert cache.wait(5)
+    name = cache.get(client, MODEL, INSTRUCTION)
+    assert name is not None
+    assert stored(client) == [name]
+    assert client.caches.list()[0].display_name == DISPLAY_NAME_PREFIX + cache_key(MODEL, INSTRUCTION)
+
+    clock.now += 60
+    assert cache.get(client, MODEL, INSTRUCTION) == name
+    assert client.caches.created == 1
+    assert cache.stats['created'] == 1
+    assert (cache.stats['hits'], cache.stats['uncached']) == (2, 1)
+
+def test_disabled_never_calls_the_api(clock, client):
+    cache = make_cache(enabled = False)
+    assert cache.get(client, MODEL, INSTRUCTION) is None
+    assert cache.wait(0)
+    assert client.caches.created == 0
+
+def test_renewed_before_it_expires(clock, client, monkeypatch):
+    cache = make_cache()
+    name = settle(cache, client)
+    updates = []
+    update = client.caches.update
+    monkeypatch.setattr(client.caches, 'update', lambda **kwargs: updates.append(kwargs['name']) or update(**kwargs))
+
+    clock.now += 3600 - 300 - 1 # Not yet in the renewal window
+    assert cache.get(client, MODEL, INSTRUCTION) == name
+    assert cache.wait(5)
+    assert updates == []
+
+    clock.now += 2 # Within renew_before of the expiry: still served while it is renewed
+    assert cache.get(client, MODEL, INSTRUCTION) == name
+    assert cache.wait(5)
+    assert updates == [name]
+    assert cache.stats['renewed'] == 1
+    assert cache.snapshot()['expires_in'] == 3600
+
+    # The renewed TTL holds: an hour after the original expiry the same cache is still used.
+    clock.now += 3000
+    assert cache.get(client, MODEL, INSTRUCTION) == name
+    assert client.caches.created == 1
+
+def test_expired_cache_is_recreated(clock, client):
+    cache = make_cache()
+    first = settle(cache, client)
+    client.caches.delete(name = first) # Expired on the server
+
+    clock.now += 3601
+    second = settle(cache, client)
+    assert second not in (None, first)
+    assert client.caches.created == 2
+
+@pytest.mark.parametrize('model, instruction', [('gemini-2.5-pro', INSTRUCTION), (MODEL, INSTRUCTION + 'Only free events.')])
+def test_model_or_instruction_change_replaces_the_cache(clock, client, model, instruction):
+    cache = make_cache()
+    old = settle(cache, client)
+
+    new = settle(cache, client, model, instruction)
+    assert new not in (None, old)
+    # The stale cache is deleted rather than left to expire.
+    assert stored(client) == [new]
+    assert cache.stats['invalidated'] == 1
+    assert client.caches.list()[0].display_name == DISPLAY_NAME_PREFIX + cache_key(model, instruction)
+
+def test_missing_cache_is_recreated_after_invalidate(clock, client):
+    cache = make_cache()
+    old = settle(cache, client)
+    client.caches.delete(name = old)
+    # What request_config's callers do when a request fails with a 404 for the cache.
+    cache.invalidate()
+
+    new = settle(cache, client)
+    assert new not in (None, old)
+    assert stored(client) == [new]
+
+def test_404_on_renew_creates_a_new_cache(clock, client):
+    cache = make_cache()
+    old = settle(cache, client)
+    client.caches.delete(name = old)
+
+    clock.now += 3600 - 100 # The renewal gets the 404
+    cache.get(client, MODEL, INSTRUCTION)
+    assert cache.wait(5)
+    new = cache.get(client, MODEL, INSTRUCTION)
+    assert new not in (None, old)
+    assert cache.stats['invalidated'] == 1
+    assert cache.stats['created'] == 2
+
+def test_existing_cache_of_another_process_is_reused(clock, client):
+    name = settle(make_cache(), client)
+
+    cache = make_cache()
+    assert settle(cache, client) == name
+    assert cache.stats['reused'] == 1
+    assert client.caches.created == 1
+
+def test_refused_cache_is_retried_later(clock):
+    client = FakeGeminiClient(min_cache_tokens = 100000)
+    cache = make_cache()
+    assert settle(cache, client) is None
+    assert cache.stats['failed'] == 1
+
+    clock.now += 599
+    assert settle(cache, client) is None
+    assert cache.stats['failed'] == 1 # Not retried yet
+
+    client.caches.min_tokens = 10
+    clock.now += 2
+    assert settle(cache, client) is not None
+
+def test_instruction_below_the_model_minimum_is_never_cached(clock, client, monkeypatch):
+    cache = make_cache(min_tokens = {'gemini-2.5-flash': 1024})
+    counted = []
+    count_tokens = client.models.count_tokens
+    monkeypatch.setattr(client.models, 'count_tokens', lambda **kwargs: counted.append(1) or count_tokens(**kwargs))
+
+    assert settle(cache, client) is None
+    clock.now += 3 * 3600
+    assert settle(cache, client) is None
+    # Counted once, and neither listed nor created.
+    assert counted == [1]
+    assert client.caches.created == 0
+    assert cache.stats['too_small'] == 1
+
+def test_shipped_instruction_is_below_the_flash_minimum():
+    # Why the cache stays off for the shipped model: every request sends the instruction uncached.
+    assert estimate_tokens(CONCIERGE_INSTRUCTION) < min_cache_tokens('gemini-2.5-flash')
+    assert min_cache_tokens('models/gemini-2.5-pro-preview') == 2048
+
+def test_no_caller_waits_for_the_api(clock, client, monkeypatch):
+    cache = make_cache()
+    creating, release = threading.Event(), threading.Event()
+    create = client.caches.create
+
+    def slow_create(**kwargs):
+        creating.set()
+        release.wait(5)
+        return create(**kwargs)
+
+    monkeypatch.setattr(client.caches, 'create', slow_create)
+    assert cache.get(client, MODEL, INSTRUCTION) is None
+    assert creating.wait(5)
+
+    # Neither blocked on the create in flight nor starting a second one.
+    assert cache.get(client, MODEL, INSTRUCTION) is None
+    assert not cache.wait(0)
+
+    release.set()
+    assert cache.wait(5)
+    name = cache.get(client, MODEL, INSTRUCTION)
+    assert name is not None
+    assert client.caches.created == 1
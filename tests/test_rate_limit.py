@@ -0,0 +1,166 @@
+# Standard Libraries
+import time
+import asyncio
+import threading
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from utils.rate_limit import ModelScheduler, model_priority, is_retryable, INTERACTIVE, BACKGROUND, BATCH
+
+class Throttled(Exception):
+    code = 429
+
+class Overloaded(Exception):
+    status_code = 503
+
+def make_scheduler(**kwargs):
+    # Fast and without backoff unless a test asks otherwise.
+    settings = dict(rate = 1000, burst = 1000, min_rate = 1, max_in_flight = 10, max_retries = 2, backoff_base = 0, backoff_max = 0)
+    return ModelScheduler(**{**settings, **kwargs})
+
+def wait_until(condition, timeout = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_is_retryable():
+    assert is_retryable(Throttled())
+    assert is_retryable(Overloaded())
+    assert is_retryable(Exception('429 RESOURCE_EXHAUSTED'))
+    assert not is_retryable(ValueError('bad request'))
+
+def test_token_bucket_spends_the_burst_then_waits_for_the_rate():
+    scheduler = make_scheduler(rate = 20, burst = 2)
+    start = time.perf_counter()
+    for _ in range(2):
+        scheduler.acquire()
+    assert time.perf_counter() - start < 0.03
+    scheduler.acquire()
+    assert time.perf_counter() - start >= 0.04 # One token every 1 / 20 s
+    for _ in range(3):
+        scheduler.release()
+
+def test_in_flight_cap():
+    scheduler = make_scheduler(max_in_flight = 1)
+    scheduler.acquire()
+    started = threading.Event()
+    def second():
+        with scheduler.slot():
+            started.set()
+    thread = threading.Thread(target = second)
+    thread.start()
+    assert not started.wait(0.1)
+    assert scheduler.snapshot()['in_flight'] == 1
+    scheduler.release()
+    assert started.wait(1)
+    thread.join()
+    assert scheduler.snapshot()['in_flight'] == 0
+
+def test_queued_calls_are_served_in_priority_order():
+    scheduler = make_scheduler(max_in_flight = 1)
+    scheduler.acquire()
+    order = []
+    def call(priority):
+        with model_priority(priority):
+            with scheduler.slot():
+                order.append(priority)
+    threads = []
+    for priority in (BATCH, BACKGROUND, INTERACTIVE):
+        threads.append(threading.Thread(target = call, args = (priority,)))
+        threads[-1].start()
+        wait_until(lambda: scheduler.queued() == len(threads))
+    assert scheduler.snapshot()['queue_depth'] == {'interactive': 1, 'background': 1, 'batch': 1}
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order == [INTERACTIVE, BACKGROUND, BATCH]
+
+def test_throttling_halves_the_rate_and_successes_restore_it():
+    scheduler = make_scheduler(rate = 10, min_rate = 2)
+    for expected in (5, 2.5, 2):
+        scheduler.acquire()
+        scheduler.release(Throttled())
+        assert scheduler.rate == expected
+    scheduler.acquire()
+    scheduler.release(ValueError('bad request')) # Not a quota error, leaves the rate alone
+    assert scheduler.rate == 2
+    for expected in (3, 4):
+        scheduler.acquire()
+        scheduler.release()
+        assert scheduler.rate == pytest.approx(expected)
+    assert scheduler.stats['throttled'] == 3
+
+def test_backoff_is_bounded_and_pauses_every_caller():
+    scheduler = make_scheduler(backoff_base = 0.05, backoff_max = 0.08)
+    for attempt in range(5):
+        assert 0 <= scheduler.backoff(attempt) <= min(0.08, 0.05 * 2 ** attempt)
+    scheduler = make_scheduler(backoff_base = 1, backoff_max = 1)
+    delay = scheduler.backoff(0)
+    assert 0 < scheduler.snapshot()['paused_for'] <= delay
+
+def test_call_retries_throttled_calls():
+    scheduler = make_scheduler()
+    attempts = []
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled()
+        return 'ok'
+    assert scheduler.call(flaky) == 'ok'
+    assert len(attempts) == 3
+    assert scheduler.stats['retries'] == 2
+    assert scheduler.snapshot()['in_flight'] == 0
+
+def test_call_gives_up_after_max_retries():
+    scheduler = make_scheduler(max_retries = 1)
+    def throttled():
+        raise Throttled()
+    with pytest.raises(Throttled):
+        scheduler.call(throttled)
+    assert scheduler.stats == {'calls': 2, 'throttled': 2, 'retries': 1, 'failed': 1}
+
+def test_call_does_not_retry_other_errors():
+    scheduler = make_scheduler()
+    def broken():
+        raise ValueError('bad request')
+    with pytest.raises(ValueError):
+        scheduler.call(broken)
+    assert scheduler.stats['calls'] == 1
+    assert scheduler.stats['failed'] == 1
+
+def test_stream_retries_only_before_the_first_item():
+    scheduler = make_scheduler()
+    attempts = []
+    def stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise Throttled()
+        yield 'first'
+        raise Throttled()
+    items = []
+    with pytest.raises(Throttled):
+        for item in scheduler.stream(stream):
+            items.append(item)
+    assert items == ['first']
+    assert len(attempts) == 2
+    assert scheduler.snapshot()['in_flight'] == 0
+
+def test_cancelled_acquire_async_gives_the_slot_back():
+    scheduler = make_scheduler(max_in_flight = 1)
+    scheduler.acquire()
+
+    async def main():
+        task = asyncio.create_task(scheduler.acquire_async())
+        await asyncio.sleep(0.05)
+        assert scheduler.queued() == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The worker thread takes the slot once it is free and hands it straight back.
+        scheduler.release()
+
+    asyncio.run(main())
+    wait_until(lambda: scheduler.queued() == 0 and scheduler.snapshot()['in_flight'] == 0)
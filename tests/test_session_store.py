@@ -0,0 +1,69 @@
+# Standard Libraries
+import asyncio
+
+# Non-Standard Libraries
+from google.adk.events import Event
+from google.genai import types
+
+# Custom Modules
+from services.session_store import BoundedSessionService
+
+APP, USER = 'locale-test', 'user'
+
+def message(author, text):
+    return Event(author = author, content = types.Content(role = 'user' if author == 'user' else 'model', parts = [types.Part(text = text)]))
+
+def function_call(name):
+    return Event(author = 'agent', content = types.Content(role = 'model', parts = [types.Part.from_function_call(name = name, args = {})]))
+
+def function_response(name):
+    return Event(author = 'agent', content = types.Content(role = 'user', parts = [types.Part.from_function_response(name = name, response = {'ok': True})]))
+
+def run_turns(service, turns):
+    async def run():
+        session = await service.create_session(app_name = APP, user_id = USER, session_id = 's')
+        for turn in turns:
+            for event in turn:
+                await service.append_event(session, event)
+        return await service.get_session(app_name = APP, user_id = USER, session_id = 's')
+    return asyncio.run(run())
+
+def texts(session):
+    return [part.text or (part.function_call or part.function_response).name for event in session.events for part in event.content.parts]
+
+def test_trims_whole_turns():
+    service = BoundedSessionService(':memory:', max_events = 4)
+    session = run_turns(service, [
+        [message('user', 'first'), function_call('search'), function_response('search'), message('agent', 'answer 1')],
+        [message('user', 'second'), message('agent', 'answer 2')],
+    ])
+    # Dropping just the two oldest events would have left the search response without its call.
+    assert texts(session) == ['second', 'answer 2']
+    assert service.snapshot()['events_trimmed'] == 4
+
+def test_keeps_the_turns_that_fit():
+    service = BoundedSessionService(':memory:', max_events = 5)
+    session = run_turns(service, [
+        [message('user', 'first'), message('agent', 'answer 1')],
+        [message('user', 'second'), message('agent', 'answer 2')],
+        [message('user', 'third'), message('agent', 'answer 3')],
+    ])
+    assert texts(session) == ['second', 'answer 2', 'third', 'answer 3']
+
+def test_current_turn_is_never_split():
+    service = BoundedSessionService(':memory:', max_events = 2)
+    session = run_turns(service, [
+        [message('user', 'first'), function_call('search'), function_response('search'), message('agent', 'answer 1')],
+    ])
+    assert texts(session) == ['first', 'search', 'search', 'answer 1']
+    assert service.snapshot()['events_trimmed'] == 0
+
+def test_snapshot():
+    service = BoundedSessionService(':memory:', max_in_memory = 1)
+    async def create():
+        for session_id in ('a', 'b'):
+            await service.create_session(app_name = APP, user_id = USER, session_id = session_id)
+    asyncio.run(create())
+    stats = service.snapshot()
+    assert (stats['created'], stats['sessions_in_memory'], stats['sessions_on_disk'], stats['lru_evictions']) == (2, 1, 2, 1)
+    assert stats['approx_memory_bytes'] > 0
@@ -0,0 +1,78 @@
+# Standard Libraries
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Non-Standard Libraries
+import pytest
+
+# Custom Modules
+from services.single_flight import SingleFlight, Abandoned
+
+def wait_until(condition, timeout = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+    def search():
+        runs.append(1)
+        release.wait(2)
+        return ['Jazz Night']
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flights.do, 'jazz', search) for _ in range(4)]
+        wait_until(lambda: flights.stats['coalesced'] == 3)
+        assert flights.snapshot()['in_flight'] == 1
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [['Jazz Night']] * 4
+    assert len(runs) == 1
+    assert flights.snapshot() == {'leaders': 1, 'coalesced': 3, 'in_flight': 0}
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    assert flights.do('jazz', lambda: 'jazz') == 'jazz'
+    assert flights.do('opera', lambda: 'opera') == 'opera'
+    assert flights.stats == {'leaders': 2, 'coalesced': 0}
+
+def test_later_calls_run_again():
+    flights = SingleFlight()
+    runs = []
+    for _ in range(2):
+        flights.do('jazz', runs.append, 1)
+    assert len(runs) == 2
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight()
+    future, leader = flights.begin('jazz')
+    follower, follower_leads = flights.begin('jazz')
+    assert leader and not follower_leads and follower is future
+    flights.finish('jazz', future, error = RuntimeError('quota'))
+    with pytest.raises(RuntimeError):
+        follower.result()
+    assert flights.snapshot()['in_flight'] == 0
+
+def test_leader_error_is_raised_and_closes_the_flight():
+    flights = SingleFlight()
+    def broken():
+        raise RuntimeError('quota')
+    with pytest.raises(RuntimeError):
+        flights.do('jazz', broken)
+    assert flights.do('jazz', lambda: 'ok') == 'ok'
+
+def test_followers_of_an_abandoned_leader_run_themselves():
+    flights = SingleFlight()
+    future, _ = flights.begin('jazz')
+    result = []
+    follower = threading.Thread(target = lambda: result.append(flights.do('jazz', lambda: 'own run')))
+    follower.start()
+    wait_until(lambda: flights.stats['coalesced'] == 1)
+    flights.finish('jazz', future, error = Abandoned())
+    follower.join(2)
+    assert result == ['own run']
@@ -0,0 +1,210 @@
+'''
+Headless batch search: runs a file of (interests, location, dates) queries through the search pipeline
+(fan-out, result cache, event store, Gemini) and streams the validated events to JSONL or Parquet.
+
+    python -m tools.batch_search queries.jsonl --output events.jsonl --concurrency 4
+    python -m tools.batch_search queries.csv --output events.parquet
+
+Queries are JSONL objects or CSV rows with the fields id (optional), interests (a list, or a string separated
+by ";"), location, and either date or start_date / end_date (YYYY-MM-DD). Finished queries are checkpointed
+next to the output, so an interrupted run picks up where it stopped when started again with the same output.
+'''
+# Standard Libraries
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+os.environ.setdefault('PREFETCH_ENABLED', '0')
+os.environ.setdefault('METRICS_LOG_ENABLED', '0')
+
+# Custom Modules
+from concierge.parsing import validate_event
+from services.search_service import search_events
+from utils.metrics import metrics
+from utils.rate_limit import model_priority, BATCH
+
+def parse_interests(value):
+    if isinstance(value, str):
+        value = value.split(';')
+    return [interest.strip() for interest in value or [] if interest and interest.strip()]
+
+def parse_query(row):
+    '''Turns one JSONL object or CSV row into a query dictionary; raises ValueError when it is unusable.'''
+    interests = parse_interests(row.get('interests'))
+    location = (row.get('location') or '').strip()
+    start = row.get('start_date') or row.get('date')
+    end = row.get('end_date') or start
+    if not interests or not location or not start:
+        raise ValueError('interests, location and a date are required')
+    start, end = datetime.date.fromisoformat(str(start)), datetime.date.fromisoformat(str(end))
+    query = {'interests': interests, 'location': location, 'start_date': start.isoformat(), 'end_date': end.isoformat()}
+    # Without an explicit id the query itself is the id, so resuming still matches after lines are reordered.
+    query['id'] = str(row.get('id') or hashlib.sha1(json.dumps(query, sort_keys = True).encode('utf-8')).hexdigest()[:12])
+    return query
+
+def read_queries(path):
+    '''Reads the queries of a .jsonl or .csv file, skipping (and reporting) malformed lines.'''
+    with open(path, encoding = 'utf-8', newline = '') as f:
+        rows = csv.DictReader(f) if path.endswith('.csv') else f
+        queries = []
+        for line, row in enumerate(rows, start = 2 if path.endswith('.csv') else 1):
+            if isinstance(row, str) and not row.strip():
+                continue
+            try:
+                queries.append(parse_query(row if isinstance(row, dict) else json.loads(row)))
+            except ValueError as e:
+                print(f"ERROR: Skipping query on line {line}: {e}", file = sys.stderr)
+    return queries
+
+def run_query(query, deadline):
+    '''Searches one query at batch priority, returns (validated events, rejected count, interests missing).'''
+    incomplete = []
+    with model_priority(BATCH):
+        events = search_events(
+            query['interests'], query['location'],
+            (datetime.date.fromisoformat(query['start_date']), datetime.date.fromisoformat(query['end_date'])),
+            incomplete = incomplete.extend, deadline = deadline
+        )
+    validated = [event for event in map(validate_event, events) if event is not None]
+    return validated, len(events) - len(validated), incomplete
+
+class Checkpoint:
+    '''
+    Append-only record of the finished queries (<output>.checkpoint.jsonl).
+    On resume, event rows of queries that never reached the checkpoint (the run stopped halfway) are dropped
+    from the events file, so re-running them does not duplicate events.
+    '''
+
+    def __init__(self, path, events_path, resume):
+        self.path = path
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, encoding = 'utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry['status'] == 'done':
+                            self.done[entry['id']] = entry
+            self._truncate(events_path)
+        else:
+            for stale in (path, events_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        self._file = open(path, 'a', encoding = 'utf-8')
+
+    def _truncate(self, events_path):
+        if not os.path.exists(events_path):
+            return
+        kept = events_path + '.tmp'
+        with open(events_path, encoding = 'utf-8') as src, open(kept, 'w', encoding = 'utf-8') as dst:
+            for line in src:
+                if line.strip() and json.loads(line)['query_id'] in self.done:
+                    dst.write(line)
+        os.replace(kept, events_path)
+
+    def record(self, query, status, **fields):
+        self._file.write(json.dumps({'id': query['id'], 'status': status, **fields}) + '\n')
+        # Flushed after the events file, so a checkpointed query always has all of its events on disk.
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+def write_parquet(events_path, output):
+    '''Converts the finished JSONL events file into the Parquet output.'''
+    import pandas as pd
+
+    table = pd.read_json(events_path, lines = True, dtype = False) if os.path.getsize(events_path) else pd.DataFrame(columns = ['query_id'])
+    table.to_parquet(output, index = False)
+
+def format_progress(stats, total, started):
+    elapsed = time.perf_counter() - started
+    finished = stats['done'] + stats['failed']
+    rate = finished / elapsed if elapsed else 0.0
+    eta = (total - finished) / rate if rate else 0.0
+    return (f"[{finished}/{total}] {rate:.2f} queries/s, {stats['events']} events, "
+            f"{stats['failed']} failed, {stats['incomplete']} incomplete, ETA {eta:.0f}s")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Run a file of event searches headlessly and write the events to JSONL or Parquet.')
+    parser.add_argument('queries', help = 'Queries file (.jsonl or .csv).')
+    parser.add_argument('--output', default = 'events.jsonl', help = 'Events file, .jsonl or .parquet.')
+    parser.add_argument('--concurrency', type = int, default = 4, help = 'Queries searched at the same time (their model calls share the process rate limit).')
+    parser.add_argument('--deadline', type = float, default = None, help = 'Per query deadline in seconds (default: none, wait for every interest).')
+    parser.add_argument('--restart', action = 'store_true', help = 'Ignore the checkpoint of a previous run and start over.')
+    args = parser.parse_args(argv)
+
+    queries = read_queries(args.queries)
+    parquet = args.output.endswith('.parquet')
+    # Parquet cannot be appended to: events are streamed to a JSONL file (kept for resuming) that is converted at the end.
+    events_path = args.output + '.rows.jsonl' if parquet else args.output
+    checkpoint = Checkpoint(args.output + '.checkpoint.jsonl', events_path, resume = not args.restart)
+    pending = [query for query in queries if query['id'] not in checkpoint.done]
+
+    stats = {'queries': len(queries), 'skipped': len(queries) - len(pending), 'done': 0, 'failed': 0, 'incomplete': 0, 'events': 0, 'rejected': 0}
+    print(f"{len(pending)} queries to run, {stats['skipped']} already done", file = sys.stderr)
+
+    started = time.perf_counter()
+    remaining = iter(pending)
+    with open(events_path, 'a', encoding = 'utf-8') as out, ThreadPoolExecutor(max_workers = args.concurrency, thread_name_prefix = 'batch-search') as pool:
+        # At most two queries per worker in flight, so large query files are not all submitted up front.
+        running = {}
+        def fill():
+            while len(running) < 2 * args.concurrency:
+                query = next(remaining, None)
+                if query is None:
+                    return
+                running[pool.submit(run_query, query, args.deadline)] = query
+        fill()
+        while running:
+            finished, _ = wait(running, return_when = FIRST_COMPLETED)
+            for future in finished:
+                query = running.pop(future)
+                try:
+                    events, rejected, incomplete = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    print(f"ERROR: Query {query['id']} failed: {e}", file = sys.stderr)
+                    checkpoint.record(query, 'failed', error = str(e))
+                    continue
+                for event in events:
+                    out.write(json.dumps({'query_id': query['id'], **event}, ensure_ascii = False) + '\n')
+                out.flush()
+                os.fsync(out.fileno())
+                # Queries that missed interests at the deadline are not done, a resumed run searches them again.
+                checkpoint.record(query, 'incomplete' if incomplete else 'done', events = len(events), rejected = rejected, incomplete = incomplete)
+                stats['done'] += 1
+                stats['events'] += len(events)
+                stats['rejected'] += rejected
+                stats['incomplete'] += bool(incomplete)
+                print(format_progress(stats, len(pending), started), file = sys.stderr)
+            fill()
+    checkpoint.close()
+
+    if parquet and stats['failed'] == 0:
+        write_parquet(events_path, args.output)
+    elif parquet:
+        print(f"Parquet not written, {stats['failed']} queries failed; run again to retry them", file = sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    counters = metrics.snapshot()['counters']
+    stats.update(
+        elapsed_s = elapsed,
+        queries_per_s = (stats['done'] + stats['failed']) / elapsed if elapsed else 0.0,
+        events_per_s = stats['events'] / elapsed if elapsed else 0.0,
+        prompt_tokens = counters.get('tokens.prompt', 0),
+        output_tokens = counters.get('tokens.output', 0),
+        output = args.output,
+    )
+    print(json.dumps(stats, indent = 2), file = sys.stderr)
+    return 1 if stats['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
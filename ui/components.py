@@ -1,17 +1,15 @@
 # Standard Libraries
-import time
+import math
 import datetime
-import ast
 
 # Non-Standard Libraries
 import streamlit as st
-import folium
-import pandas as pd
 
 # Custom Modules
-from config.settings import MESSAGE_HISTORY_KEY
-from services.concierge_service import run_adk_sync
-from concierge.agent import invoke
+from config.settings import MESSAGE_HISTORY_KEY, SEARCH_POLL_INTERVAL, EVENTS_PAGE_SIZE, DEFAULT_INTERESTS, SEARCH_DEADLINE
+from services.search_jobs import submit_search
+from utils.helpers import response_key
+from utils.metrics import metrics
 
 def login_screen():
     '''Google OAuth'''
@@ -22,28 +20,32 @@ def login_screen():
 def load_right_column():
     if st.session_state.search:
         st.session_state.search = False
-        prompt = f"""
-                    Conduct a google search of an area to help the user find an activity/event based on their provided interests below. Ensure the events are relevant and occur on the day at the place provided:
-                    User Interests: {st.session_state.interests}
-                    Date Range: {st.session_state.date_range}
-                    Location: {st.session_state.location}
-                    """
-            
-        with st.spinner('Searching...', show_time = True):
-            agent_response = invoke(prompt)
-            
-            st.toast("Hip!")
-            time.sleep(0.5)
-            st.toast("Hip!")
-            time.sleep(0.5)
-            st.toast("Hooray!", icon="🎉")
-
-        st.session_state.agent_response = ast.literal_eval(agent_response.strip().strip('```json').strip('```').strip())
+        # Runs in the background, a newer search from this session cancels the outdated one
+        st.session_state.search_job = submit_search(
+            st.session_state.interests,
+            st.session_state.location,
+            st.session_state.date_range,
+            previous = st.session_state.search_job
+        )
+        st.session_state.search_incomplete = []
+
+    finished = st.session_state.pop('search_finished', None)
+    if finished == 'done' and not st.session_state.search_incomplete:
+        st.toast("Hip!")
+        st.toast("Hip!")
+        st.toast("Hooray!", icon="🎉")
+    elif finished == 'failed':
+        st.error('The search failed, please try again.')
+    if st.session_state.search_incomplete and st.session_state.search_job is None:
+        st.warning(
+            f"Results may be missing for {', '.join(st.session_state.search_incomplete)}: "
+            f"the search did not finish within {SEARCH_DEADLINE:g} seconds or failed. Search again to retry just those."
+        )
 
-    if st.session_state.agent_response:
-        load_events(st.session_state.agent_response)
+    if st.session_state.search_job is not None:
+        search_progress()
     else:
-        st.info("Press *Search* for assistance")
+        results_panel()
     ''' 
     if st.session_state.agent_response:
         st.info('Map Test Version (Not Complete)')
@@ -64,11 +66,53 @@ def load_right_column():
     '''  
     
 
+@st.fragment(run_every = SEARCH_POLL_INTERVAL)
+def search_progress():
+    '''Polls the session's background search, showing its progress and the events found so far.'''
+    job = st.session_state.search_job
+    if job is None:
+        return
+
+    if job.done or job.cancelled:
+        # Keep what was found (all of it, or the part before a cancel) and rerun the app to stop polling;
+        # a cancelled job winds down its model streams on its own.
+        st.session_state.agent_response = job.events()
+        st.session_state.agent_response_key = response_key(st.session_state.agent_response)
+        st.session_state.search_finished = 'cancelled' if job.cancelled else job.status
+        st.session_state.search_incomplete = [] if job.cancelled else job.incomplete
+        st.session_state.search_job = None
+        st.rerun()
+
+    done, total = job.progress
+    progress_col, cancel_col = st.columns([4, 1])
+    with progress_col:
+        st.progress(done / total if total else 0.0, text = f'Searching... ({done}/{total})' if total else 'Searching...')
+    with cancel_col:
+        if st.button('Cancel'):
+            job.cancel()
+            st.rerun()
+
+    events = job.events()
+    if events:
+        load_events(events)
+
+@st.fragment
+def results_panel():
+    '''
+    The results of the last search. Its own fragment, and the inputs have theirs,
+    so it is only rebuilt by full reruns, which happen when a search starts or finishes.
+    '''
+    if st.session_state.agent_response:
+        load_events(st.session_state.agent_response, st.session_state.agent_response_key, controls = True)
+    else:
+        st.info("Press *Search* for assistance")
+
+@st.fragment
 def load_left_column():
     # Interests component
         st.session_state.interests = st.multiselect(
             '**Please add your interests**',
-            ['Art', 'Jazz', 'Farmer\'s Market', 'Theatre', 'Hiking',' Disco'],
+            DEFAULT_INTERESTS,
             max_selections = 20,
             accept_new_options = True
         )
@@ -96,60 +140,140 @@ def load_left_column():
 
             if st.button('Search', type = 'primary'):
                 st.session_state.search = True
+                # The inputs only rerun their own fragment, a search needs the whole app
+                st.rerun()
         else:
             st.info('Please Add Interests to Begin Search')
         
         st.header('', divider = 'violet')
 
-def load_events(events):
-    df = pd.DataFrame(events)
-
-    # Prepare data for map: split coordinates into lat/lon
-    map_df = df.copy()
-    map_df[['lat', 'lon']] = map_df['event_location'].str.split(', ', expand=True).astype(float)
-    
-    st.subheader(f"📍 Map View ({len(map_df)} Events)")
-    st.map(map_df[['lat', 'lon']], zoom=10, use_container_width=True)
+EVENT_COLUMNS = ['event_name', 'event_category', 'event_date', 'event_location', 'event_description', 'event_source_link']
+_COORDINATES = r'(-?\d+(?:\.\d+)?)[^\d-]+(-?\d+(?:\.\d+)?)' # "43.7696, 11.2558"
+_FIRST_DATE = r'(\d{4})[./-](\d{1,2})[./-](\d{1,2})' # "2025.10.23 - 2025.10.30" -> 2025.10.23
+SORT_ORDERS = {'Date': ['start', 'event_name'], 'Name': ['event_name'], 'Category': ['event_category', 'start']}
+
+def event_table(events):
+    '''
+    Single vectorized parse pass over the events:
+    adds float lat/lon, the Google Maps link and the start date used for sorting.
+    '''
+    import pandas as pd # Only needed once there are results, keeps it off the login page's cold start
+
+    with metrics.span('ui.build_dataframe', events = len(events)):
+        table = pd.DataFrame(events).reindex(columns = EVENT_COLUMNS)
+        table[EVENT_COLUMNS] = table[EVENT_COLUMNS].fillna('').astype(str)
+
+        coordinates = table['event_location'].str.extract(_COORDINATES)
+        table['lat'] = pd.to_numeric(coordinates[0], errors = 'coerce')
+        table['lon'] = pd.to_numeric(coordinates[1], errors = 'coerce')
+        # NaN (no link) where the coordinates did not parse
+        table['map_link'] = 'https://www.google.com/maps/search/?api=1&query=' + coordinates[0] + ',' + coordinates[1]
+
+        dates = table['event_date'].str.extract(_FIRST_DATE).astype(float)
+        table['start'] = pd.to_datetime(pd.DataFrame({'year': dates[0], 'month': dates[1], 'day': dates[2]}), errors = 'coerce')
+        return table
+
+@st.cache_data(max_entries = 64, show_spinner = False)
+def build_event_table(key, _events):
+    '''event_table of a finished response, cached per response (key is response_key(_events)).'''
+    return event_table(_events)
+
+def load_events(events, key = None, controls = False):
+    '''
+    Map and cards of the events; with controls, also category filter, sort order and pagination.
+    A finished response (key given) uses its cached table. The growing events of a running search are
+    parsed on every poll instead, so they never push the finished responses out of the cache.
+    '''
+    table = build_event_table(key, events) if key else event_table(events)
+    with metrics.span('ui.load_events', events = len(table)):
+        if controls:
+            table = filter_events(table, key)
+        load_map(table)
+        load_event_cards(table, key if controls else None)
+
+def filter_events(table, key):
+    '''Category filter and sort order widgets, applied to the cached table with vectorized pandas operations.'''
+    category_col, sort_col = st.columns([3, 1])
+    with category_col:
+        # Keyed on the response, so selections never refer to categories of an older search
+        categories = st.multiselect('Categories', sorted(table['event_category'].unique()), placeholder = 'All categories', key = f'categories_{key}')
+    with sort_col:
+        order = st.selectbox('Sort by', list(SORT_ORDERS), key = f'sort_{key}')
+
+    if categories:
+        table = table[table['event_category'].isin(categories)]
+    return table.sort_values(
+        SORT_ORDERS[order],
+        key = lambda column: column.str.casefold() if column.dtype == object else column,
+        na_position = 'last',
+        kind = 'stable'
+    )
+
+def load_map(table):
+    points = table[['lat', 'lon']].dropna()
+
+    st.subheader(f"📍 Map View ({len(table)} Events)")
+    st.map(points, zoom=10, use_container_width=True)
     st.divider()
 
-    # Iterate through the filtered events and display them
-    for _, event in df.iterrows():
-        # Use st.container to create a distinct, visually separated card for each event
-        # Add a border using markdown/CSS injection for a cleaner look
-        with st.container(border=True):
-            
-            # 1. Title and Category
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.subheader(event['event_name'])
-            with col2:
-                # Use st.badge for a highlighted category
-                st.caption(f"Category: **{event['event_category']}**")
-
-
-            # 2. Key Details (Date and Location)
-            # Use another set of columns for side-by-side details
-            date_col, location_col = st.columns(2)
-            
-            with date_col:
-                st.markdown(f"🗓️ **When:** {event['event_date']}")
-            
-            with location_col:
-                # Link to Google Maps (approximate location using coordinates)
-                lat, lon = event['event_location'].split(', ')
-                map_link = f"https://www.google.com/maps/search/?api=1&query={lat},{lon}"
-                st.markdown(f"🗺️ **Where:** [{event['event_location']}]({map_link})")
+def load_event_cards(table, key = None):
+    '''
+    Renders one page of EVENTS_PAGE_SIZE cards. With a key a page selector is shown,
+    without one (e.g. while a search is still running) only the first page.
+    '''
+    pages = max(1, math.ceil(len(table) / EVENTS_PAGE_SIZE))
+    page = 1
+    if key is not None and pages > 1:
+        page_key = f'page_{key}'
+        if st.session_state.get(page_key, 1) > pages:
+            # The filter left fewer pages than the one selected
+            st.session_state[page_key] = pages
+        page = st.number_input(f'Page (of {pages})', min_value = 1, max_value = pages, key = page_key, width = 150)
+
+    shown = table.iloc[(page - 1) * EVENTS_PAGE_SIZE:page * EVENTS_PAGE_SIZE]
+    for event in shown.to_dict('records'):
+        load_event_card(event)
+    if key is None and len(table) > len(shown):
+        st.caption(f'{len(table) - len(shown)} more events...')
+
+def load_event_card(event):
+    # Use st.container to create a distinct, visually separated card for each event
+    # Add a border using markdown/CSS injection for a cleaner look
+    with st.container(border=True):
+        
+        # 1. Title and Category
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.subheader(event['event_name'])
+        with col2:
+            # Use st.badge for a highlighted category
+            st.caption(f"Category: **{event['event_category']}**")
+
+
+        # 2. Key Details (Date and Location)
+        # Use another set of columns for side-by-side details
+        date_col, location_col = st.columns(2)
+        
+        with date_col:
+            st.markdown(f"🗓️ **When:** {event['event_date']}")
+        
+        with location_col:
+            # Link to Google Maps (approximate location using coordinates), precomputed by event_table
+            if isinstance(event['map_link'], str):
+                st.markdown(f"🗺️ **Where:** [{event['event_location']}]({event['map_link']})")
+            else:
+                st.markdown(f"🗺️ **Where:** {event['event_location']}")
 
 
-            # 3. Description (using expander for tidiness)
-            with st.expander("Read Full Description"):
-                st.markdown(event['event_description'])
+        # 3. Description (using expander for tidiness)
+        with st.expander("Read Full Description"):
+            st.markdown(event['event_description'])
 
-            # 4. Source Link
-            st.markdown(f"[Source Link]({event['event_source_link']})")
-        
-        # Add a small vertical space after each card (optional, as st.container adds margin)
-        st.write("")
+        # 4. Source Link
+        st.markdown(f"[Source Link]({event['event_source_link']})")
+    
+    # Add a small vertical space after each card (optional, as st.container adds margin)
+    st.write("")
 
 def load_header():
     '''Title & Logo'''
@@ -187,6 +311,9 @@ def load_sidebar():
         st.header('Speak with the :violet[Architect]', divider = 'violet')
         
         
+        # Imported here, services.concierge_service loads the whole google.adk stack.
+        from services.concierge_service import run_adk_sync
+
         # Initialize chat message history in Streamlit's session state if it doesn't exist.
         if MESSAGE_HISTORY_KEY not in st.session_state:
             st.session_state[MESSAGE_HISTORY_KEY] = []
@@ -209,7 +336,7 @@ def load_sidebar():
                             Interests: {st.session_state.interests}
                             Location: {st.session_state.location}
                             Date: {st.session_state.date_range}
-                            ''') # Call the synchronous ADK runner.
+                            ''', interests = st.session_state.interests) # Call the synchronous ADK runner, one parallel search per interest.
                     print(f"DEBUG UI: Received response from ADK: {agent_response[:50]}...")
                     message_placeholder.markdown(agent_response) # Update the placeholder with the final response.
             
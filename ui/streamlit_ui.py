@@ -1,4 +1,8 @@
 
+# Standard Libraries
+import time
+_import_started = time.perf_counter()
+
 # Non-Standard Libraries
 from dotenv import load_dotenv
 import streamlit as st
@@ -6,8 +10,13 @@ import streamlit as st
 # Custom Modules
 from config.settings import get_api_key
 from utils.helpers import init_session_state
+from utils.metrics import metrics
+from services.prefetch import get_prefetch_scheduler
 from ui.components import load_header, load_sidebar, load_left_column, load_right_column
 
+# Once per process: what a cold start pays for the app's own imports (google.genai, google.adk and pandas load lazily).
+metrics.observe('startup.import_app', time.perf_counter() - _import_started)
+
 # Import Environment Variables
 load_dotenv()
 
@@ -32,6 +41,9 @@ def run_streamlit_app():
         st.stop() # Stop the application if the API key is missing, prompting the user for action.
     
 
+    # Background cache warming for popular searches (started once per process)
+    get_prefetch_scheduler()
+
     # Load sidebar (Login & info)
     load_sidebar()
     
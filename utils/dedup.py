@@ -0,0 +1,88 @@
+# Standard Libraries
+import re
+import math
+import unicodedata
+from difflib import SequenceMatcher
+
+# Custom Modules
+from config.settings import DEDUP_CELL_DEGREES, DEDUP_NAME_SIMILARITY
+from utils.query import normalize_text, parse_event_dates, parse_coordinates
+
+def canonical_name(name):
+    '''Accent, case and punctuation folded event name, e.g. "Café Jazz: Night #2" -> "cafe jazz night 2".'''
+    text = unicodedata.normalize('NFKD', normalize_text(name))
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    return ' '.join(re.findall(r'\w+', text))
+
+def spatial_cell(event, cell_degrees = DEDUP_CELL_DEGREES):
+    '''Grid cell (lat, lon indices) of the event's coordinates, or None when they do not parse.'''
+    coordinates = parse_coordinates(event.get('event_location'))
+    if coordinates is None:
+        return None
+    return math.floor(coordinates[0] / cell_degrees), math.floor(coordinates[1] / cell_degrees)
+
+def canonical_key(event, cell_degrees = DEDUP_CELL_DEGREES):
+    '''
+    Canonical identity of an event: folded name, parsed date span and spatial cell,
+    so the same event written with different date formats or slightly different coordinates shares a key.
+    '''
+    dates = parse_event_dates(event.get('event_date'))
+    span = f'{dates[0].isoformat()}/{dates[1].isoformat()}' if dates else normalize_text(event.get('event_date'))
+    cell = spatial_cell(event, cell_degrees)
+    return f"{canonical_name(event.get('event_name'))}|{span}|{'' if cell is None else f'{cell[0]}:{cell[1]}'}"
+
+def similar_names(first, second, threshold = DEDUP_NAME_SIMILARITY):
+    '''
+    Fuzzy match of two canonical names: close spelling, or every word of the shorter one (two at least)
+    appearing in the longer one, e.g. "firenze jazz festival" and "firenze jazz festival piazzale michelangelo".
+    Names with different numbers ("night 1", "night 2") are never the same event.
+    '''
+    if first == second:
+        return True
+    shorter, longer = sorted((set(first.split()), set(second.split())), key = len)
+    # Before the subset check: "jazz night" is not "jazz night 1" either.
+    if {word for word in shorter if word.isdigit()} != {word for word in longer if word.isdigit()}:
+        return False
+    if len(shorter) >= 2 and shorter <= longer:
+        return True
+    # The cheap upper bounds reject most pairs before the full ratio is computed.
+    matcher = SequenceMatcher(None, first, second)
+    return matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+def dates_overlap(first, second):
+    '''True when two (start, end) spans overlap; an unknown span matches anything.'''
+    if first is None or second is None:
+        return True
+    return first[0] <= second[1] and second[0] <= first[1]
+
+class EventDeduplicator:
+    '''
+    Incremental near-duplicate removal. Each event is only compared with the kept events in its own and the
+    eight neighbouring spatial cells (events without coordinates with each other), so the pass stays near-linear.
+    Duplicates are merged into the first event seen: its empty fields are filled from the duplicate.
+    '''
+
+    def __init__(self, cell_degrees = DEDUP_CELL_DEGREES, threshold = DEDUP_NAME_SIMILARITY):
+        self.cell_degrees = cell_degrees
+        self.threshold = threshold
+        self.merged = 0
+        self._blocks = {} # cell (or None) -> [(canonical name, date span, kept event)]
+
+    def add(self, event):
+        '''Returns True if the event is new, False if it was merged into an event already kept.'''
+        name = canonical_name(event.get('event_name'))
+        dates = parse_event_dates(event.get('event_date'))
+        cell = spatial_cell(event, self.cell_degrees)
+
+        neighbours = [None] if cell is None else [(cell[0] + dlat, cell[1] + dlon) for dlat in (-1, 0, 1) for dlon in (-1, 0, 1)]
+        for block in neighbours:
+            for kept_name, kept_dates, kept in self._blocks.get(block, ()):
+                if dates_overlap(dates, kept_dates) and similar_names(name, kept_name, self.threshold):
+                    for field, value in event.items():
+                        if value and not kept.get(field):
+                            kept[field] = value
+                    self.merged += 1
+                    return False
+
+        self._blocks.setdefault(cell, []).append((name, dates, event))
+        return True
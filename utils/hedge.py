@@ -0,0 +1,122 @@
+# Standard Libraries
+import queue
+import threading
+import contextvars
+from contextlib import closing
+
+# Custom Modules
+from config.settings import HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY
+from utils.metrics import metrics
+from utils.rate_limit import model_scheduler
+
+_END = object() # Put on the queue when an attempt's stream is exhausted (or failed)
+
+def hedge_delay(stage):
+    '''
+    Seconds to wait for a call before hedging it: the HEDGE_PERCENTILE latency of the stage's recent calls,
+    at least HEDGE_MIN_DELAY. None (never hedge) while hedging is disabled or the stage has too few samples.
+    '''
+    if not HEDGE_ENABLED:
+        return None
+    observed = metrics.percentile(stage, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+    return None if observed is None else max(HEDGE_MIN_DELAY, observed)
+
+def _should_hedge():
+    # A duplicate would only queue behind the waiting calls in the rate limiter and add to the load that slows them.
+    if model_scheduler.queued():
+        metrics.increment('hedge.skipped')
+        return False
+    metrics.increment('hedge.sent')
+    return True
+
+def _start(target, *args):
+    # Each attempt runs in a copy of the caller's context, so its model calls keep the caller's priority.
+    threading.Thread(target = contextvars.copy_context().run, args = (target, *args), name = 'hedged-call', daemon = True).start()
+
+def hedged_call(function, delay):
+    '''
+    Runs function() and, if it has not returned after delay seconds, a duplicate of it; returns the first result.
+    An error is only raised once every attempt has failed. The slower attempt finishes in the background.
+    '''
+    if delay is None:
+        return function()
+
+    results = queue.Queue()
+
+    def attempt(index):
+        try:
+            results.put((index, function(), None))
+        except Exception as e:
+            results.put((index, None, e))
+
+    _start(attempt, 0)
+    attempts = 1
+    try:
+        index, result, error = results.get(timeout = delay)
+    except queue.Empty:
+        if _should_hedge():
+            _start(attempt, 1)
+            attempts = 2
+        index, result, error = results.get()
+    if error is not None and attempts == 2:
+        index, result, error = results.get()
+    if error is not None:
+        raise error
+    if index == 1:
+        metrics.increment('hedge.won')
+    return result
+
+def hedged_stream(function, delay):
+    '''
+    Iterates function() and, if it has not produced its first item after delay seconds, a duplicate of it as well.
+    Continues with whichever attempt produces an item first and closes the other one.
+    '''
+    if delay is None:
+        yield from function()
+        return
+
+    items = queue.Queue()
+    stopped = [threading.Event(), threading.Event()]
+
+    def attempt(index):
+        try:
+            with closing(function()) as stream:
+                for item in stream:
+                    if stopped[index].is_set():
+                        return
+                    items.put((index, item, None))
+            items.put((index, _END, None))
+        except Exception as e:
+            items.put((index, _END, e))
+
+    _start(attempt, 0)
+    running, winner, may_hedge = 1, None, True
+    try:
+        while True:
+            try:
+                index, item, error = items.get(timeout = delay if may_hedge else None)
+            except queue.Empty:
+                may_hedge = False
+                if _should_hedge():
+                    _start(attempt, 1)
+                    running += 1
+                continue
+            if winner is not None and index != winner:
+                continue
+            if item is _END:
+                running -= 1
+                if error is not None and winner is None and running:
+                    # The other attempt may still get through.
+                    continue
+                if error is not None:
+                    raise error
+                return
+            if winner is None:
+                winner, may_hedge = index, False
+                stopped[1 - index].set()
+                if index == 1:
+                    metrics.increment('hedge.won')
+            yield item
+    finally:
+        stopped[0].set()
+        stopped[1].set()
@@ -1,3 +1,7 @@
+# Standard Libraries
+import json
+import hashlib
+
 # Non-Standard Libraries
 import streamlit as st
 
@@ -7,7 +11,17 @@ def init_session_state():
         st.session_state.interests = []  # Start with one input box
     if 'agent_response' not in st.session_state:
         st.session_state.agent_response = None
+    if 'agent_response_key' not in st.session_state:
+        st.session_state.agent_response_key = None # response_key of agent_response, keys the cached render data
     if 'range_on' not in st.session_state:
         st.session_state.range_on = False
     if 'search' not in st.session_state:
-        st.session_state.search = False
\ No newline at end of file
+        st.session_state.search = False
+    if 'search_job' not in st.session_state:
+        st.session_state.search_job = None # SearchJob of the running background search
+    if 'search_incomplete' not in st.session_state:
+        st.session_state.search_incomplete = [] # Interests missing from the last search's results
+
+def response_key(events):
+    '''Stable hash of a list of events, used to key st.cache_data so derived data is only rebuilt for a new response.'''
+    return hashlib.sha1(json.dumps(events, sort_keys = True, default = str).encode('utf-8')).hexdigest()
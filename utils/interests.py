@@ -0,0 +1,41 @@
+# Standard Libraries
+from difflib import get_close_matches
+
+# Custom Modules
+from config.settings import DEFAULT_INTERESTS, INTEREST_ALIASES, INTEREST_FUZZY_MATCHING, INTEREST_FUZZY_CUTOFF, INTEREST_FUZZY_MIN_LENGTH
+from utils.query import normalize_text
+
+# Folded spelling -> canonical interest, for every known interest and alias
+_KNOWN = {normalize_text(interest): interest for interest in DEFAULT_INTERESTS}
+_KNOWN.update({normalize_text(interest): interest for interest in INTEREST_ALIASES.values()})
+_KNOWN.update({normalize_text(alias): interest for alias, interest in INTEREST_ALIASES.items()})
+
+def canonical_interest(interest, fuzzy = INTEREST_FUZZY_MATCHING):
+    '''
+    Canonical form of one interest: case and whitespace folded, aliases resolved ("jazz music" -> "Jazz")
+    and, with fuzzy, close misspellings of a known interest matched ("Theatr" -> "Theatre"); only spellings of at least
+    INTEREST_FUZZY_MIN_LENGTH characters that start with the same letter are compared.
+    Unknown interests keep their own spelling with the whitespace collapsed; None for a blank one.
+    '''
+    folded = normalize_text(interest)
+    if not folded:
+        return None
+    if folded in _KNOWN:
+        return _KNOWN[folded]
+    if fuzzy and len(folded) >= INTEREST_FUZZY_MIN_LENGTH:
+        # Typos rarely hit the first letter, and between short words a single letter is already a different word.
+        candidates = [known for known in _KNOWN if len(known) >= INTEREST_FUZZY_MIN_LENGTH and known[0] == folded[0]]
+        match = get_close_matches(folded, candidates, n = 1, cutoff = INTEREST_FUZZY_CUTOFF)
+        if match:
+            return _KNOWN[match[0]]
+    return ' '.join(str(interest).split())
+
+def canonical_interests(interests, fuzzy = INTEREST_FUZZY_MATCHING):
+    '''Canonical interests in their original order, without blanks and without the duplicates folding reveals.'''
+    canonical, seen = [], set()
+    for interest in interests or []:
+        interest = canonical_interest(interest, fuzzy)
+        if interest is not None and normalize_text(interest) not in seen:
+            seen.add(normalize_text(interest))
+            canonical.append(interest)
+    return canonical
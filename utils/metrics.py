@@ -0,0 +1,128 @@
+# Standard Libraries
+import json
+import math
+import time
+import logging
+import threading
+from collections import defaultdict, deque, Counter
+from contextlib import contextmanager
+
+# Custom Modules
+from config.settings import METRICS_SAMPLE_WINDOW, METRICS_LOG_ENABLED
+
+# Structured (one JSON object per line) span and event logs, independent of the app wide ERROR log level.
+logger = logging.getLogger('locale.metrics')
+logger.setLevel(logging.INFO if METRICS_LOG_ENABLED else logging.WARNING)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+logger.propagate = False
+
+def _percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list: the smallest sample at or above fraction of them.
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+class Metrics:
+    '''
+    Process wide, lightweight tracing: timed spans per stage (latency histograms over the last
+    METRICS_SAMPLE_WINDOW samples) and monotonically increasing counters for tokens, cache hits and errors.
+    '''
+
+    def __init__(self, window = METRICS_SAMPLE_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen = window)) # stage -> recent durations in seconds
+        self._totals = Counter() # stage -> number of spans ever recorded
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        '''Records one duration for the stage.'''
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._totals[stage] += 1
+
+    def increment(self, name, value = 1):
+        '''Adds value to the named counter.'''
+        with self._lock:
+            self._counters[name] += value
+
+    def percentile(self, stage, fraction, min_samples = 1):
+        '''Percentile of the stage's recent durations, None while it has fewer than min_samples.'''
+        with self._lock:
+            samples = self._samples.get(stage)
+            if not samples or len(samples) < min_samples:
+                return None
+            ordered = sorted(samples)
+        return _percentile(ordered, fraction)
+
+    @contextmanager
+    def span(self, stage, **fields):
+        '''
+        Times the enclosed block as one span of the stage and logs it as a structured record.
+        Exceptions are counted as "<stage>.errors" and re-raised.
+        '''
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield fields
+        except GeneratorExit:
+            # The consumer closed a stream early (e.g. a cancelled search), this is not a failure.
+            status = 'cancelled'
+            raise
+        except BaseException:
+            status = 'error'
+            self.increment(f'{stage}.errors')
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(stage, seconds)
+            logger.info(json.dumps({'type': 'span', 'stage': stage, 'seconds': round(seconds, 6), 'status': status, **fields}, default = str))
+
+    def log(self, event, level = logging.INFO, **fields):
+        '''
+        Logs a structured record of something that happened (a retry, a fallback, a failure) on the metrics logger.
+        INFO records are only written while METRICS_LOG_ENABLED is on, warnings and errors always are.
+        '''
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({'type': 'event', 'event': event, 'level': logging.getLevelName(level), **fields}, default = str))
+
+    def record_usage(self, usage_metadata, prefix = 'tokens'):
+        '''Adds the token counts of a Gemini response's usage_metadata to the token counters.'''
+        if usage_metadata is None:
+            return
+        for field, name in (('prompt_token_count', 'prompt'), ('candidates_token_count', 'output'), ('cached_content_token_count', 'cached'),
+                            ('thoughts_token_count', 'thoughts'), ('tool_use_prompt_token_count', 'tool_use'), ('total_token_count', 'total')):
+            value = getattr(usage_metadata, field, None)
+            if value:
+                self.increment(f'{prefix}.{name}', value)
+
+    def snapshot(self):
+        '''Returns per-stage latency percentiles (in seconds) and every counter.'''
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            totals = dict(self._totals)
+            counters = dict(self._counters)
+
+        stages = {}
+        for stage, ordered in samples.items():
+            if not ordered:
+                continue
+            stages[stage] = {
+                'count': totals[stage],
+                'mean': sum(ordered) / len(ordered),
+                'p50': _percentile(ordered, 0.50),
+                'p95': _percentile(ordered, 0.95),
+                'p99': _percentile(ordered, 0.99),
+                'max': ordered[-1],
+            }
+        return {'stages': stages, 'counters': counters}
+
+    def reset(self):
+        '''Clears every sample and counter.'''
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+metrics = Metrics()
@@ -0,0 +1,89 @@
+# Standard Libraries
+import re
+import datetime
+
+# Custom Modules
+from config.settings import DATE_WINDOW_SIZES, MAX_DATE_WINDOWS
+
+def normalize_text(value):
+    '''Case and whitespace folding used for cache keys (e.g. " Firenze,  Italia" -> "firenze, italia").'''
+    return ' '.join(str(value or '').split()).casefold()
+
+def normalize_date_range(date_range):
+    '''
+    Turns the value of the date picker into an inclusive (start, end) tuple of dates.
+    Streamlit returns a single date, a 1-tuple while a range is half selected, or a 2-tuple.
+    '''
+    if isinstance(date_range, (tuple, list)):
+        dates = [d for d in date_range if d is not None]
+    else:
+        dates = [date_range] if date_range is not None else []
+
+    if not dates:
+        today = datetime.date.today()
+        return today, today
+
+    # datetime is a subclass of date, keep only the day part
+    dates = [d.date() if isinstance(d, datetime.datetime) else d for d in dates]
+    return min(dates), max(dates)
+
+# Windows are aligned to a fixed grid so overlapping searches map onto the same cached windows.
+_WINDOW_EPOCH = datetime.date(2024, 1, 1).toordinal() # A Monday, so 7 day windows run Monday to Sunday
+
+def split_date_range(date_range, sizes = DATE_WINDOW_SIZES, max_windows = MAX_DATE_WINDOWS):
+    '''
+    Splits a date range into fixed, grid aligned windows of (start, end) dates.
+    Uses the smallest window size from sizes that covers the range in at most max_windows windows.
+    The first and last window may reach outside the range; callers filter events back to it.
+    '''
+    start, end = normalize_date_range(date_range)
+    for size in sizes:
+        first = (start.toordinal() - _WINDOW_EPOCH) // size
+        last = (end.toordinal() - _WINDOW_EPOCH) // size
+        if last - first + 1 <= max_windows or size == sizes[-1]:
+            break
+
+    return [
+        (datetime.date.fromordinal(_WINDOW_EPOCH + index * size), datetime.date.fromordinal(_WINDOW_EPOCH + (index + 1) * size - 1))
+        for index in range(first, last + 1)
+    ]
+
+def format_date_range(date_range):
+    '''Formats a date range the way the concierge instruction writes dates, e.g. "2025.10.23 - 2025.10.30".'''
+    start, end = normalize_date_range(date_range)
+    if start == end:
+        return start.strftime('%Y.%m.%d')
+    return f"{start.strftime('%Y.%m.%d')} - {end.strftime('%Y.%m.%d')}"
+
+_EVENT_DATE = re.compile(r'(\d{4})[./-](\d{1,2})[./-](\d{1,2})')
+
+def parse_event_dates(text):
+    '''Returns the (first, last) date found in an event_date string like "2025.10.23 - 2025.10.30", or None.'''
+    dates = []
+    for year, month, day in _EVENT_DATE.findall(str(text or '')):
+        try:
+            dates.append(datetime.date(int(year), int(month), int(day)))
+        except ValueError:
+            continue
+    if not dates:
+        return None
+    return min(dates), max(dates)
+
+def event_in_range(event, start, end):
+    '''True when the event overlaps [start, end]; events with unparsable dates are kept.'''
+    dates = parse_event_dates(event.get('event_date'))
+    if dates is None:
+        return True
+    return dates[0] <= end and dates[1] >= start
+
+_COORDINATES = re.compile(r'(-?\d+(?:\.\d+)?)[^\d-]+(-?\d+(?:\.\d+)?)')
+
+def parse_coordinates(text):
+    '''Returns the (lat, lon) floats of an event_location string like "43.7696, 11.2558", or None.'''
+    match = _COORDINATES.search(str(text or ''))
+    if match is None:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
@@ -0,0 +1,190 @@
+# Standard Libraries
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# Custom Modules
+from config.settings import (MODEL_RATE_PER_SECOND, MODEL_BURST, MODEL_MIN_RATE, MODEL_MAX_IN_FLIGHT,
+                             MODEL_MAX_RETRIES, MODEL_BACKOFF_BASE, MODEL_BACKOFF_MAX)
+from utils.metrics import metrics
+
+# Lower values are served first when calls are queued.
+INTERACTIVE, BACKGROUND, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background', BATCH: 'batch'}
+
+# Priority of the model calls made by the current context (a search job, the prefetcher, a batch run).
+_priority = contextvars.ContextVar('model_priority', default = INTERACTIVE)
+
+@contextmanager
+def model_priority(priority):
+    '''Runs the enclosed model calls at the given priority.'''
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def is_retryable(error):
+    '''True for quota (429) and overload (503) errors of the Gemini API.'''
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    return code in (429, 503) or 'RESOURCE_EXHAUSTED' in str(error)
+
+class ModelScheduler:
+    '''
+    Process wide gate in front of every model call: a token bucket (rate per second, burst) and a cap
+    on calls in flight, served in priority order (interactive before background before batch).
+    429/503 responses pause every caller for an exponential, jittered backoff and halve the rate;
+    each success adds back a tenth of the configured rate.
+    '''
+
+    def __init__(self, rate = MODEL_RATE_PER_SECOND, burst = MODEL_BURST, min_rate = MODEL_MIN_RATE, max_in_flight = MODEL_MAX_IN_FLIGHT,
+                 max_retries = MODEL_MAX_RETRIES, backoff_base = MODEL_BACKOFF_BASE, backoff_max = MODEL_BACKOFF_MAX):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiting = [] # heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self.stats = {'calls': 0, 'throttled': 0, 'retries': 0, 'failed': 0}
+
+    def acquire(self, priority = None):
+        '''Blocks until the call may start: first in the priority queue, below the in-flight cap and with a token.'''
+        priority = _priority.get() if priority is None else priority
+        enqueued = time.perf_counter()
+        with self._cond:
+            entry = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, entry)
+            while True:
+                timeout = None
+                if self._waiting[0] == entry and self._in_flight < self.max_in_flight:
+                    timeout = self._take_token()
+                    if timeout == 0:
+                        break
+                self._cond.wait(timeout)
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            self.stats['calls'] += 1
+            # The next caller in line may be able to go as well
+            self._cond.notify_all()
+        metrics.observe(f'model.queue_wait.{PRIORITY_NAMES.get(priority, priority)}', time.perf_counter() - enqueued)
+
+    def release(self, error = None):
+        '''Ends a call; a 429/503 error halves the rate, a success raises it again.'''
+        with self._cond:
+            self._in_flight -= 1
+            if error is not None and is_retryable(error):
+                self.stats['throttled'] += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif error is None:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+            self._cond.notify_all()
+
+    def backoff(self, attempt):
+        '''Pauses every caller for the jittered exponential backoff of the attempt, and returns it.'''
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)) # Full jitter
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    @contextmanager
+    def slot(self, priority = None):
+        '''Holds one call slot for the enclosed block.'''
+        self.acquire(priority)
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.release(error)
+
+    async def acquire_async(self, priority = None):
+        '''acquire() for coroutines: the waiting happens in a worker thread so the event loop keeps running.'''
+        priority = _priority.get() if priority is None else priority
+        acquired = asyncio.get_running_loop().run_in_executor(None, self.acquire, priority)
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The worker thread still takes the slot once it is its turn, hand it straight back then.
+            acquired.add_done_callback(lambda f: f.cancelled() or f.exception() is not None or self.release(asyncio.CancelledError()))
+            raise
+
+    def call(self, function, *args, **kwargs):
+        '''Runs function(*args, **kwargs) in a slot, retrying 429/503 errors up to max_retries times.'''
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot():
+                    return function(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.stats['failed'] += 1
+                    raise
+                self.stats['retries'] += 1
+                metrics.log('model.throttled', attempt = attempt, retry_in_s = round(self.backoff(attempt), 3), error = repr(e))
+
+    def stream(self, function, *args, **kwargs):
+        '''
+        Iterates function(*args, **kwargs) in a slot held for the whole stream.
+        Retries like call() as long as nothing has been yielded yet; later errors are raised.
+        '''
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                with self.slot():
+                    for item in function(*args, **kwargs):
+                        started = True
+                        yield item
+                return
+            except Exception as e:
+                if started or not is_retryable(e) or attempt == self.max_retries:
+                    self.stats['failed'] += 1
+                    raise
+                self.stats['retries'] += 1
+                metrics.log('model.throttled', attempt = attempt, retry_in_s = round(self.backoff(attempt), 3), error = repr(e), streaming = True)
+
+    def queued(self):
+        '''Number of calls waiting for a slot.'''
+        with self._cond:
+            return len(self._waiting)
+
+    def snapshot(self):
+        '''Current queue depth per priority, calls in flight, adaptive rate and counters.'''
+        with self._cond:
+            waiting = Counter(priority for priority, _ in self._waiting)
+            return dict(
+                self.stats,
+                queue_depth = {name: waiting[priority] for priority, name in PRIORITY_NAMES.items()},
+                in_flight = self._in_flight,
+                rate = self.rate,
+                paused_for = max(0.0, self._paused_until - time.monotonic())
+            )
+
+    def _take_token(self):
+        # Returns 0 after taking a token, otherwise the seconds to wait for one (or for a backoff pause to end).
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+model_scheduler = ModelScheduler()